@@ -5,7 +5,10 @@ Detailed analysis of what sub-queries were generated during degradation.
 """
 
 import boto3
+from boto3.dynamodb.conditions import Key
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict
 from decimal import Decimal
@@ -14,6 +17,18 @@ from decimal import Decimal
 dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
 table = dynamodb.Table('SearchQueryLogs')
 
+# boto3 resources aren't thread-safe: worker threads each get their own Table
+_local = threading.local()
+
+
+def _thread_table():
+    """Table for the calling thread (the module-level one on the main thread)."""
+    if threading.current_thread() is threading.main_thread():
+        return table
+    if not hasattr(_local, "table"):
+        _local.table = boto3.session.Session().resource('dynamodb', region_name='us-east-1').Table('SearchQueryLogs')
+    return _local.table
+
 
 def _convert_decimals(obj):
     """Convert Decimal types to native Python types."""
@@ -29,9 +44,10 @@ def _convert_decimals(obj):
 
 def get_search_by_id(query_id: str) -> Dict:
     """Fetch search by query_id."""
-    response = table.scan(
-        FilterExpression='query_id = :qid',
-        ExpressionAttributeValues={':qid': query_id}
+    # query_id is the table's partition key: a Query reads one item, not the whole table
+    response = _thread_table().query(
+        KeyConditionExpression=Key('query_id').eq(query_id),
+        Limit=1
     )
 
     items = response.get('Items', [])
@@ -138,9 +154,15 @@ def main():
         ("8d048382-b4bd-46c4-812e-67e0ec8b7449", "RECOVERED (00:14:16)"),
     ]
 
+    # Fetch all searches concurrently (one round trip of wall time), print in order
+    query_ids = [query_id for query_id, _ in searches_to_analyze]
+    print(f"\nFetching {len(query_ids)} searches...")
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        fetched = dict(zip(query_ids, ex.map(get_search_by_id, query_ids)))
+
     for query_id, label in searches_to_analyze:
-        print(f"\nFetching {query_id}...")
-        search = get_search_by_id(query_id)
+        print(f"\n{query_id}:")
+        search = fetched[query_id]
 
         if search:
             print_multiquery_details(search, label)
@@ -155,9 +177,9 @@ def main():
     print("\nComparing sub-queries between good and degraded searches:")
     print("(This will help identify if degraded searches had problematic sub-query generation)")
 
-    # Fetch and compare
-    good_search = get_search_by_id("8f05713a-965c-4fc2-ac51-38575983daad")
-    bad_search = get_search_by_id("31e68fba-4297-4e0e-bab7-c1c08f1d00e5")
+    # Compare (both were fetched above)
+    good_search = fetched["8f05713a-965c-4fc2-ac51-38575983daad"]
+    bad_search = fetched["31e68fba-4297-4e0e-bab7-c1c08f1d00e5"]
 
     if good_search and bad_search:
         good_sqs = good_search.get('multi_query_status', {}).get('sub_queries', [])
@@ -4,6 +4,7 @@ Fetch specific search query IDs directly
 """
 
 import boto3
+from boto3.dynamodb.conditions import Key
 import json
 from datetime import datetime
 from typing import Dict, Any
@@ -126,10 +127,10 @@ def get_search_details(query_id):
     """Get detailed search info by query_id."""
     print(f"\nFetching search: {query_id}")
 
-    # Scan to find the item
-    response = table.scan(
-        FilterExpression='query_id = :qid',
-        ExpressionAttributeValues={':qid': query_id}
+    # query_id is the table's partition key: a Query reads one item, not the whole table
+    response = table.query(
+        KeyConditionExpression=Key('query_id').eq(query_id),
+        Limit=1
     )
 
     items = response.get('Items', [])
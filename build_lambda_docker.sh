@@ -17,6 +17,7 @@ docker run --rm \
             requests-aws4auth \
             pytz \
             numpy \
+            orjson \
             -q && \
         cp /var/task/search.py /tmp/package/ && \
         cp /var/task/common.py /tmp/package/ && \
@@ -38,6 +39,7 @@ docker run --rm \
             requests-aws4auth \
             pytz \
             numpy \
+            orjson \
             -q && \
         cp /var/task/search_detailed_scoring.py /tmp/package/ && \
         cp /var/task/common.py /tmp/package/ && \
@@ -211,7 +211,8 @@ def cache_text_embedding(
     dynamodb_client,
     text: str,
     embedding: List[float],
-    model: str
+    model: str,
+    text_hash: Optional[str] = None
 ) -> None:
     """
     Cache text embedding with metadata.
@@ -221,10 +222,12 @@ def cache_text_embedding(
         text: Input text that was embedded
         embedding: Embedding vector
         model: Model ID used
+        text_hash: Precomputed sha256 hex digest of text (computed if omitted)
     """
     try:
         # Calculate hash as primary key
-        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if text_hash is None:
+            text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
 
         # Create composite key: text_hash + model_id
         # This ensures different models cache separately
@@ -262,7 +265,8 @@ def cache_text_embedding(
 def get_cached_text_embedding(
     dynamodb_client,
     text: str,
-    model: str = None
+    model: str = None,
+    text_hash: Optional[str] = None
 ) -> Optional[List[float]]:
     """
     Retrieve cached text embedding.
@@ -273,13 +277,15 @@ def get_cached_text_embedding(
         dynamodb_client: Boto3 DynamoDB client
         text: Input text to look up
         model: Model ID to look up (if None, tries without model key for backward compatibility)
+        text_hash: Precomputed sha256 hex digest of text (computed if omitted)
 
     Returns:
         Embedding vector if cached, None if not found
     """
     try:
         # Calculate hash
-        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if text_hash is None:
+            text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
 
         # Create composite key if model provided
         if model:
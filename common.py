@@ -15,19 +15,37 @@ Architecture:
 """
 
 import base64
+import copy
+import functools
+import hashlib
 import json
 import logging
 import os
 import time
+import queue
 import random
-from typing import Any, Dict, Iterable, List
+import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import boto3
+import numpy as np
+import requests
 from botocore.config import Config
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from opensearchpy import JSONSerializer, OpenSearch, RequestsHttpConnection, TransportError, helpers
 from requests_aws4auth import AWS4Auth
 
+try:
+    import orjson  # C-accelerated JSON for Bedrock/OpenSearch payloads
+except ImportError:  # Fall back to stdlib json when the package isn't bundled
+    orjson = None
+
 # ===============================================
 # ENVIRONMENT CONFIGURATION
 # ===============================================
@@ -47,14 +65,123 @@ TEXT_MODEL_ID = os.getenv("TEXT_EMBED_MODEL", "amazon.titan-embed-text-v2:0")  #
 IMAGE_MODEL_ID = os.getenv("IMAGE_EMBED_MODEL", "amazon.titan-embed-image-v1")  # Image embeddings
 LLM_MODEL_ID = os.getenv("LLM_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")  # Feature extraction
 
+# Output token cap for the vision analysis call. A full analysis JSON is ~300-600
+# tokens; the cap bounds worst-case generation time on runaway feature lists.
+VISION_MAX_TOKENS = int(os.getenv("VISION_MAX_TOKENS", "800"))
+
 # Vector dimensions (must match model outputs)
 TEXT_DIM = int(os.getenv("TEXT_DIM", "1024"))   # Titan Text v2 outputs 1024-dim vectors
 IMAGE_DIM = int(os.getenv("IMAGE_DIM", "1024"))  # Titan Image outputs 1024-dim vectors
 
+# Stored kNN vector type: "float" (float32) or "byte" (int8 Lucene byte vectors).
+# Byte vectors are ~4x smaller in the HNSW graph at a small recall cost; they only
+# apply to indexes created with this setting (requires OpenSearch 2.9+).
+OS_VECTOR_DTYPE = os.getenv("OS_VECTOR_DTYPE", "float").lower()
+
+# Optional HNSW scalar-quantization encoder for float vectors: "sq" has Lucene
+# store vectors quantized internally (OpenSearch 2.16+) while documents and
+# queries stay float32. Empty = full-precision float storage.
+OS_KNN_ENCODER = os.getenv("OS_KNN_ENCODER", "").lower()
+
+# HNSW graph parameters (index build time) and ef_search (query time).
+# ef_search is only sent when set: per-query method_parameters needs OpenSearch 2.16+.
+# Native memory per vector field is roughly 1.1 * (bytes_per_dim * dim + 8 * HNSW_M) * docs,
+# with bytes_per_dim = 4 for float, 2 for faiss fp16 (sq), 1 for byte. At 1024 dims and
+# m=16 that is ~4.6 KB per vector for float, so size data nodes for every image vector
+# in listings-v2 (not just one per listing). Raising HNSW_M grows only the 8*m term.
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EFC = int(os.getenv("HNSW_EFC", "400"))
+HNSW_EFS = int(os.getenv("HNSW_EFS", "0"))
+
+# kNN similarity for new indexes: "cosinesimil" (default) or "innerproduct".
+# With innerproduct, index_vector() unit-normalizes document and query vectors
+# so the dot product equals cosine (same ranking and scores) without per-distance
+# norm computations in the HNSW graph. Applies to newly created indexes only.
+OS_KNN_SPACE = os.getenv("OS_KNN_SPACE", "cosinesimil").lower()
+
+# Shared int8 scale for innerproduct + byte indexes: unit-vector component value
+# mapped to 127 (larger components clip). 1024-dim unit vectors rarely exceed ~0.2,
+# so this keeps most of the int8 range instead of wasting it on the [-1, 1] bound.
+OS_BYTE_IP_PEAK = float(os.getenv("OS_BYTE_IP_PEAK", "0.25"))
+
+# HNSW engine for new indexes: "lucene" (default) or "faiss" (native, SIMD distance
+# kernels, graphs held off the JVM heap). With faiss, OS_KNN_ENCODER=sq stores fp16
+# vectors (half the graph memory). PQ is not offered: faiss PQ needs a trained model
+# (train API + model_id) rather than a plain mapping. Pair faiss with
+# OS_KNN_SPACE=innerproduct on clusters older than 2.19 (no faiss cosinesimil).
+OS_KNN_ENGINE = os.getenv("OS_KNN_ENGINE", "lucene").lower()
+
+# In-process LRU size for text embeddings (first tier in front of the DynamoDB cache).
+# Entries are float32 arrays (~4 KB per 1024-dim vector), so the default text +
+# multimodal + image LRUs stay around 35 MB on a 512 MB Lambda.
+EMBED_LRU_SIZE = int(os.getenv("EMBED_LRU_SIZE", "4096"))
+
+# In-process LRU size for image embeddings keyed by image content (~4 KB per entry)
+IMAGE_EMBED_LRU_SIZE = int(os.getenv("IMAGE_EMBED_LRU_SIZE", "512"))
+
+# Max concurrent Bedrock InvokeModel calls issued by the batch helpers (embed_texts)
+BEDROCK_CONCURRENCY = int(os.getenv("BEDROCK_CONCURRENCY", "12"))
+
+# Bedrock batch inference (create_model_invocation_job) for offline bulk embedding.
+# Needs a service role Bedrock can assume to read/write the S3 job prefix; batches
+# below the minimum record count go through the real-time embed_texts() path.
+BEDROCK_BATCH_ROLE_ARN = os.getenv("BEDROCK_BATCH_ROLE_ARN", "")
+BEDROCK_BATCH_MIN_RECORDS = int(os.getenv("BEDROCK_BATCH_MIN_RECORDS", "1000"))
+BEDROCK_BATCH_POLL_SECONDS = int(os.getenv("BEDROCK_BATCH_POLL_SECONDS", "60"))
+
 # Image processing configuration
 MAX_IMAGES = int(os.getenv("MAX_IMAGES", "0"))  # Max images to process per listing (0 = unlimited)
 EMBEDDING_IMAGE_WIDTH = int(os.getenv("EMBEDDING_IMAGE_WIDTH", "576"))  # Target resolution for embeddings (cost optimization)
 
+# Index refresh interval while ingesting ("-1" disables refresh during bulk loads).
+# finalize_index() restores the pre-load interval once an ingest job ends.
+OS_REFRESH_INTERVAL = os.getenv("OS_REFRESH_INTERVAL", "30s")
+
+# Shard layout for new indexes. Replicas start at 0 during the initial load and
+# finalize_index() raises them to OS_REPLICAS once the ingest job ends (existing
+# indexes get back whatever replica count they had before the load).
+OS_SHARDS = int(os.getenv("OS_SHARDS", "2"))
+OS_REPLICAS = int(os.getenv("OS_REPLICAS", "1"))
+OS_FORCEMERGE = os.getenv("OS_FORCEMERGE", "false").lower() == "true"  # Merge to 1 segment on finalize
+OS_BULK_ROUTING = os.getenv("OS_BULK_ROUTING", "")  # e.g. "optimized" (CSS-compatible clusters only)
+
+# Worker threads for the batched bulk path in bulk_upsert (unused when BULK_THREADS > 1)
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "4"))
+
+# Log per-document bulk results at INFO (otherwise only with LOG_LEVEL=DEBUG)
+OS_BULK_VERBOSE = os.getenv("OS_BULK_VERBOSE", "false").lower() == "true"
+
+# Concurrent bulk indexing (helpers.parallel_bulk). 1 = serial path only.
+# Opt-in: parallel_bulk builds a multiprocessing ThreadPool, which needs POSIX
+# semaphores (/dev/shm) and fails with ENOSYS on AWS Lambda. Only raise this
+# on hosts that have them (EC2/local bulk scripts).
+BULK_THREADS = int(os.getenv("BULK_THREADS", "1"))
+BULK_MAX_CHUNK_BYTES = int(os.getenv("BULK_MAX_CHUNK_BYTES", str(10 * 1024 * 1024)))  # 10MB per request
+BULK_CHUNK_DOCS = int(os.getenv("BULK_CHUNK_DOCS", "100"))  # Max documents per bulk request
+BULK_CHUNK_DOCS_MAX = int(os.getenv("BULK_CHUNK_DOCS_MAX", "2000"))  # Ceiling for adaptive chunk growth
+BULK_QUEUE_SIZE = int(os.getenv("BULK_QUEUE_SIZE", "4"))  # Encoded chunks buffered ahead of the senders
+
+# OpenSearch HTTP transport: keep-alive pool sized for concurrent bulk senders,
+# and gzip request/response bodies (vector-heavy NDJSON compresses well)
+OS_POOL_MAXSIZE = int(os.getenv("OS_POOL_MAXSIZE", str(max(16, 2 * BULK_WORKERS, 2 * BULK_THREADS))))
+OS_HTTP_COMPRESS = os.getenv("OS_HTTP_COMPRESS", "true").lower() == "true"
+
+# In-process LRU size for LLM query constraint parses (repeated search queries)
+CONSTRAINTS_LRU_SIZE = int(os.getenv("CONSTRAINTS_LRU_SIZE", "4096"))
+
+# Anthropic prompt caching for static prompt prefixes (cache_control checkpoints).
+# Only newer Claude models accept cache_control on Bedrock, so this is opt-in.
+LLM_PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "false").lower() == "true"
+
+# Stream Claude responses (invoke_model_with_response_stream) for JSON-only calls,
+# closing the stream as soon as the top-level JSON object is complete.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
+
+# Optional DynamoDB cache for parsed LLM results (second tier behind the in-process
+# LRUs). Table: partition key "k" (S), TTL attribute "ttl". Empty = disabled.
+LLM_CACHE_TABLE = os.getenv("LLM_CACHE_TABLE", "")
+LLM_CACHE_TTL_DAYS = int(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+
 # Logging configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.getLogger().setLevel(LOG_LEVEL)
@@ -66,38 +193,157 @@ logger = logging.getLogger(__name__)
 
 # Get AWS credentials from the Lambda execution environment
 session = boto3.Session(region_name=AWS_REGION)
-creds = session.get_credentials().get_frozen_credentials()
 
-# Create AWS Signature V4 auth for OpenSearch
+# Create AWS Signature V4 auth for OpenSearch. The signer holds botocore's
+# refreshable credentials (not a frozen snapshot), so warm containers pick up
+# rotated role credentials instead of failing with expired tokens.
 awsauth = AWS4Auth(
-    creds.access_key, creds.secret_key, AWS_REGION,
-    "es",  # Service name for OpenSearch
-    session_token=creds.token
+    region=AWS_REGION,
+    service="es",  # Service name for OpenSearch
+    refreshable_credentials=session.get_credentials(),
 )
 
+class _OrjsonSerializer(JSONSerializer):
+    """OpenSearch serializer backed by orjson (used by helpers.parallel_bulk chunking)."""
+
+    def dumps(self, data):
+        if isinstance(data, (str, bytes)):
+            return data
+        return orjson.dumps(data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+
+
+class _RetryAfterConnection(RequestsHttpConnection):
+    """
+    RequestsHttpConnection that keeps a failed response's Retry-After header.
+
+    TransportError.info is the parsed response body, so the header is otherwise
+    lost; it is attached to the raised error as ``retry_after`` (None if absent).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last = threading.local()  # Hooks run on the requesting thread
+        self.session.hooks["response"].append(self._record_retry_after)
+
+    def _record_retry_after(self, response, *args, **kwargs):
+        self._last.retry_after = response.headers.get("Retry-After")
+
+    def perform_request(self, *args, **kwargs):
+        self._last.retry_after = None
+        try:
+            return super().perform_request(*args, **kwargs)
+        except TransportError as e:
+            e.retry_after = self._last.retry_after
+            raise
+
+
 # Initialize OpenSearch client with retry logic for production reliability
 os_client = OpenSearch(
     hosts=[{"host": OS_HOST, "port": 443}],
     http_auth=awsauth,
     use_ssl=True,
     verify_certs=True,
-    connection_class=RequestsHttpConnection,
+    connection_class=_RetryAfterConnection,  # Exposes Retry-After to bulk backoff
     timeout=240,  # 240 second timeout (4 minutes) - allows slow queries on partial indexes
     max_retries=8,  # Retry failed requests up to 8 times
     retry_on_timeout=True,
     retry_on_status=(429, 502, 503, 504),  # Retry on rate limits and server errors
+    pool_maxsize=OS_POOL_MAXSIZE,  # Keep-alive connections for concurrent bulk/search threads
+    http_compress=OS_HTTP_COMPRESS,  # gzip bodies (signed after compression by AWS4Auth)
+    serializer=_OrjsonSerializer() if orjson is not None else JSONSerializer(),
 )
 
 # Bedrock Runtime client for model invocations (embeddings + LLM)
-brt = session.client("bedrock-runtime", config=Config(read_timeout=30, retries={"max_attempts": 2}))
+# Pool sized above BEDROCK_CONCURRENCY so fan-out threads never wait on a socket;
+# adaptive retries add client-side rate limiting when Bedrock throttles.
+brt = session.client("bedrock-runtime", config=Config(
+    connect_timeout=3,
+    read_timeout=30,
+    max_pool_connections=max(50, BEDROCK_CONCURRENCY * 2),
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 4},
+))
 
 # DynamoDB client for caching
 dynamodb = session.client("dynamodb")
 
+# Shared HTTP session for image downloads: pooled keep-alive connections to the
+# photo CDN, with retries on transient gateway errors
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,  # Headroom for the image workers (up to 20 per listing in upload, 10 in CRUD)
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"]),
+))
+http_session.headers.update({"User-Agent": "hearth-indexer/1.0"})
+
 # Legacy cache table (kept for backwards compatibility during transition)
 # New code should use cache_utils.py with hearth-vision-cache and hearth-text-embeddings
 CACHE_TABLE = "hearth-image-cache"  # Old cache table - being phased out
 
+# ===============================================
+# JSON HELPERS
+# ===============================================
+
+def _json_loads(data):
+    """
+    Parse JSON from bytes or str, using orjson when available.
+
+    orjson parses bytes directly (no intermediate UTF-8 decode) and raises
+    orjson.JSONDecodeError, a subclass of json.JSONDecodeError.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON bytes, using orjson when available.
+
+    numpy arrays are serialized natively by orjson (OPT_SERIALIZE_NUMPY);
+    the stdlib fallback converts them with tolist().
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def _parse_llm_json(text: str):
+    """
+    Parse a JSON object from an LLM reply, tolerating benign format drift.
+
+    Tries the text as-is, then the outermost {...} span (drops code fences and
+    explanatory text around the object), then that span with trailing commas
+    removed.
+
+    Raises:
+        json.JSONDecodeError: If no attempt parses
+    """
+    try:
+        return _json_loads(text)
+    except json.JSONDecodeError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise json.JSONDecodeError("No JSON object in LLM response", text, 0)
+    blob = text[start:end + 1]
+    try:
+        return _json_loads(blob)
+    except json.JSONDecodeError:
+        return _json_loads(_TRAILING_COMMA_RE.sub(r"\1", blob))
+
+
+def _json_default(obj):
+    """json.dumps hook for numpy values (stdlib fallback only)."""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 # ===============================================
 # EMBEDDING GENERATION FUNCTIONS
 # ===============================================
@@ -118,17 +364,20 @@ def _parse_embed_response(payload: Dict[str, Any]) -> List[float]:
     Raises:
         ValueError: If the response format is not recognized
     """
-    # Titan format: {"embedding": [0.1, 0.2, ...]}
-    if "embedding" in payload and isinstance(payload["embedding"], list):
-        return payload["embedding"]
+    # Titan format: {"embedding": [0.1, 0.2, ...]} - checked first, one probe per key
+    vec = payload.get("embedding")
+    if isinstance(vec, list):
+        return vec
 
     # Alternative format: {"vector": [0.1, 0.2, ...]}
-    if "vector" in payload and isinstance(payload["vector"], list):
-        return payload["vector"]
+    vec = payload.get("vector")
+    if isinstance(vec, list):
+        return vec
 
     # Batch format: {"embeddings": [{"embedding": [0.1, ...]}, ...]}
-    if "embeddings" in payload:
-        e = payload["embeddings"][0]
+    embeddings = payload.get("embeddings")
+    if embeddings:
+        e = embeddings[0]
         if isinstance(e, dict) and "embedding" in e:
             return e["embedding"]
         if isinstance(e, list):
@@ -137,40 +386,122 @@ def _parse_embed_response(payload: Dict[str, Any]) -> List[float]:
     raise ValueError(f"Unrecognized embedding response keys: {list(payload.keys())}")
 
 
-def embed_text(text: str) -> List[float]:
+def _embed_text_with_model(text: str, model_id: str) -> List[float]:
     """
-    Generate a text embedding vector using Amazon Bedrock Titan Text Embeddings.
-    Results are cached in DynamoDB to avoid re-embedding same text.
+    Embed text with a Titan model, backed by the DynamoDB text embedding cache.
 
     Args:
-        text: Input text to embed (listing description, search query, etc.)
+        text: Non-empty input text
+        model_id: Bedrock model ID (also part of the cache key)
 
     Returns:
-        1024-dimensional vector representing the semantic meaning of the text
+        Embedding vector from the cache or a fresh Bedrock call
     """
-    if not text:
-        return [0.0] * TEXT_DIM  # Return zero vector for empty text
-
     # Import cache utilities
     from cache_utils import get_cached_text_embedding, cache_text_embedding
 
+    # Hash once and reuse for both the lookup and the write-back
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
     # Check cache first (with model ID to avoid cross-model cache hits)
-    cached_embedding = get_cached_text_embedding(dynamodb, text, TEXT_MODEL_ID)
+    cached_embedding = get_cached_text_embedding(dynamodb, text, model_id, text_hash=text_hash)
     if cached_embedding:
         return cached_embedding
 
     # Cache miss - generate embedding
-    body = json.dumps({"inputText": text})
-    resp = brt.invoke_model(modelId=TEXT_MODEL_ID, body=body)
-    out = json.loads(resp["body"].read().decode("utf-8"))
+    # Fixed one-key schema: splice the JSON-escaped text into a bytes template
+    body = b'{"inputText":' + _json_dumps(text) + b'}'
+    resp = brt.invoke_model(modelId=model_id, body=body)
+    out = _json_loads(resp["body"].read())
     vec = _parse_embed_response(out)
 
     # Store in cache with model ID
-    cache_text_embedding(dynamodb, text, vec, TEXT_MODEL_ID)
+    cache_text_embedding(dynamodb, text, vec, model_id, text_hash=text_hash)
 
     return vec
 
 
+class _DigestLRU:
+    """
+    Thread-safe bounded LRU keyed by a 16-byte blake2b digest of the input text.
+
+    Keying on the digest keeps memory per entry independent of text length
+    (listing descriptions can be several KB), unlike functools.lru_cache which
+    holds the full string as the key. Values are read-only float32 arrays
+    (see _frozen_vector), ~10x smaller than a tuple of Python floats.
+    """
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._data: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return _DigestLRU.bytes_key(text.encode("utf-8"))
+
+    @staticmethod
+    def bytes_key(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: bytes, value: np.ndarray):
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+
+def _frozen_vector(vec: List[float]) -> np.ndarray:
+    """Compact, read-only float32 copy of a vector for the in-process LRUs."""
+    arr = np.asarray(vec, dtype=np.float32)
+    arr.flags.writeable = False  # Cached entries can't be mutated by callers
+    return arr
+
+
+# In-process LRU tier in front of DynamoDB for hot strings (repeated queries,
+# common listing phrases). Failures are not cached because exceptions propagate.
+# Callers always get the float32-rounded list, so hits and misses are identical.
+_TEXT_EMBED_LRU = _DigestLRU(EMBED_LRU_SIZE)
+_MULTIMODAL_EMBED_LRU = _DigestLRU(EMBED_LRU_SIZE)
+
+
+def _embed_text_lru(text: str, model_id: str, lru: _DigestLRU) -> List[float]:
+    """Embed text through the in-process LRU, falling back to DynamoDB/Bedrock."""
+    key = lru.key(text)
+    vec = lru.get(key)
+    if vec is None:
+        vec = _frozen_vector(_embed_text_with_model(text, model_id))
+        lru.put(key, vec)
+    return vec.tolist()
+
+
+def embed_text(text: str) -> List[float]:
+    """
+    Generate a text embedding vector using Amazon Bedrock Titan Text Embeddings.
+    Results are cached in-process (LRU) and in DynamoDB to avoid re-embedding same text.
+
+    Args:
+        text: Input text to embed (listing description, search query, etc.)
+
+    Returns:
+        1024-dimensional vector representing the semantic meaning of the text
+    """
+    if not text or text.isspace():
+        return [0.0] * TEXT_DIM  # Return zero vector for empty/whitespace text
+
+    return _embed_text_lru(text, TEXT_MODEL_ID, _TEXT_EMBED_LRU)
+
+
 def embed_text_multimodal(text: str) -> List[float]:
     """
     Generate text embedding using the MULTIMODAL Titan model (amazon.titan-embed-image-v1).
@@ -183,7 +514,8 @@ def embed_text_multimodal(text: str) -> List[float]:
     - embed_text() uses amazon.titan-embed-text-v2:0 (text-only model)
     - embed_text_multimodal() uses amazon.titan-embed-image-v1 (multimodal model, text input)
 
-    Results are cached separately from embed_text() to avoid model confusion.
+    Results are cached separately from embed_text() to avoid model confusion
+    (both in-process and in DynamoDB, keyed by model ID).
 
     Args:
         text: Input text to embed (search query, etc.)
@@ -191,32 +523,167 @@ def embed_text_multimodal(text: str) -> List[float]:
     Returns:
         1024-dimensional vector in the multimodal embedding space
     """
-    if not text:
+    if not text or text.isspace():
         return [0.0] * IMAGE_DIM
 
-    # Import cache utilities
-    from cache_utils import get_cached_text_embedding, cache_text_embedding
+    return _embed_text_lru(text, IMAGE_MODEL_ID, _MULTIMODAL_EMBED_LRU)  # Using IMAGE model for text!
 
-    # Check cache first (with model ID to avoid cross-model cache hits)
-    cached_embedding = get_cached_text_embedding(dynamodb, text, IMAGE_MODEL_ID)
-    if cached_embedding:
-        return cached_embedding
 
-    # Cache miss - generate embedding using multimodal model
-    body = json.dumps({"inputText": text})
-    resp = brt.invoke_model(modelId=IMAGE_MODEL_ID, body=body)  # Using IMAGE model for text!
-    out = json.loads(resp["body"].read().decode("utf-8"))
-    vec = _parse_embed_response(out)
+# Shared pool for fan-out Bedrock calls. Work submitted here must not itself
+# submit to and wait on the pool (it would deadlock once all workers block).
+_BRT_POOL = ThreadPoolExecutor(max_workers=BEDROCK_CONCURRENCY, thread_name_prefix="bedrock")
 
-    # Store in cache with IMAGE_MODEL_ID to separate from text-v2 embeddings
-    cache_text_embedding(dynamodb, text, vec, IMAGE_MODEL_ID)
+_BEDROCK_RETRYABLE = ("ThrottlingException", "ModelStreamErrorException", "Too many requests")
 
-    return vec
+
+def _with_bedrock_retry(func, *args, max_retries: int = 5, base_sleep: float = 0.5, max_sleep: float = 8.0):
+    """
+    Call func(*args), retrying Bedrock throttling errors with exponential backoff + jitter.
+
+    Args:
+        func: Callable that makes the Bedrock API call
+        *args: Arguments for func
+        max_retries: Maximum number of attempts
+        base_sleep: Base sleep time in seconds
+        max_sleep: Maximum sleep time in seconds
+
+    Returns:
+        Result from func(*args)
+    """
+    for attempt in range(max_retries):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt < max_retries - 1 and any(code in str(e) for code in _BEDROCK_RETRYABLE):
+                time.sleep(min(base_sleep * (2 ** attempt), max_sleep) + random.uniform(0, 0.3))
+                continue
+            raise
+
+
+def embed_texts(texts: List[str], multimodal: bool = False, return_exceptions: bool = False) -> List[Any]:
+    """
+    Embed many texts concurrently, returning vectors in input order.
+
+    Each text goes through embed_text() (or embed_text_multimodal()), so the
+    in-process and DynamoDB caches still apply; misses fan out to Bedrock on
+    a shared pool of BEDROCK_CONCURRENCY threads with throttling retries.
+
+    Args:
+        texts: Input texts
+        multimodal: Use the multimodal Titan model (same space as image vectors)
+        return_exceptions: Put a failed text's exception in its slot instead of raising
+
+    Returns:
+        One embedding (or exception, if return_exceptions) per input text
+    """
+    fn = embed_text_multimodal if multimodal else embed_text
+    futures = [_BRT_POOL.submit(_with_bedrock_retry, fn, t) for t in texts]
+    if not return_exceptions:
+        return [f.result() for f in futures]
+    return [f.exception() or f.result() for f in futures]
+
+
+_BATCH_JOB_DONE = ("Completed", "PartiallyCompleted")
+_BATCH_JOB_FAILED = ("Failed", "Stopped", "Expired")
+
+
+def embed_texts_batch_job(texts: List[str], s3_bucket: str, s3_prefix: str,
+                          multimodal: bool = False, return_exceptions: bool = False) -> List[Any]:
+    """
+    Embed a large offline batch through a Bedrock batch inference job.
+
+    Writes one JSONL record per text to s3://{s3_bucket}/{s3_prefix}/input.jsonl,
+    submits create_model_invocation_job, polls until it finishes and reads the
+    *.jsonl.out results back. Batch jobs take minutes to schedule, so this is
+    for re-embedding/ingest scripts only; interactive paths keep embed_text().
+    Small batches (or no BEDROCK_BATCH_ROLE_ARN) fall back to embed_texts().
+
+    Unlike embed_texts(), results bypass the in-process and DynamoDB caches.
+
+    Args:
+        texts: Input texts
+        s3_bucket: Bucket for the job input/output
+        s3_prefix: Key prefix for this job (should be unique per run)
+        multimodal: Use the multimodal Titan model (same space as image vectors)
+        return_exceptions: Put a failed record's exception in its slot instead of raising
+
+    Returns:
+        One embedding (or exception, if return_exceptions) per input text
+    """
+    if not BEDROCK_BATCH_ROLE_ARN or len(texts) < BEDROCK_BATCH_MIN_RECORDS:
+        return embed_texts(texts, multimodal=multimodal, return_exceptions=return_exceptions)
+
+    model_id = IMAGE_MODEL_ID if multimodal else TEXT_MODEL_ID
+    dim = IMAGE_DIM if multimodal else TEXT_DIM
+    prefix = s3_prefix.strip("/")
+    s3 = session.client("s3")
+    bedrock = session.client("bedrock")
+
+    # Empty/whitespace texts get zero vectors locally, matching embed_text()
+    results: List[Any] = [None] * len(texts)
+    lines = []
+    for i, text in enumerate(texts):
+        if not text or text.isspace():
+            results[i] = [0.0] * dim
+            continue
+        lines.append(_json_dumps({"recordId": f"{i:011d}", "modelInput": {"inputText": text}}))
+    s3.put_object(Bucket=s3_bucket, Key=f"{prefix}/input.jsonl", Body=b"\n".join(lines) + b"\n")
+
+    job = bedrock.create_model_invocation_job(
+        jobName=f"hearth-embed-{int(time.time())}-{random.randint(0, 9999):04d}",
+        modelId=model_id,
+        roleArn=BEDROCK_BATCH_ROLE_ARN,
+        inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{s3_bucket}/{prefix}/input.jsonl"}},
+        outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{s3_bucket}/{prefix}/output/"}},
+    )
+    job_arn = job["jobArn"]
+    logger.info(f"Submitted Bedrock batch job {job_arn} ({len(lines)} records, {model_id})")
+
+    while True:
+        status = bedrock.get_model_invocation_job(jobIdentifier=job_arn)
+        state = status["status"]
+        if state in _BATCH_JOB_DONE:
+            break
+        if state in _BATCH_JOB_FAILED:
+            raise RuntimeError(f"Bedrock batch job {job_arn} ended as {state}: {status.get('message', '')}")
+        time.sleep(BEDROCK_BATCH_POLL_SECONDS)
+    logger.info(f"Bedrock batch job {job_arn} {state}")
+
+    # Output lands under output/{job id}/ as one .jsonl.out per input file
+    out_prefix = f"{prefix}/output/{job_arn.rsplit('/', 1)[-1]}/"
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=s3_bucket, Prefix=out_prefix):
+        for obj in page.get("Contents", []):
+            if not obj["Key"].endswith(".jsonl.out"):
+                continue
+            body = s3.get_object(Bucket=s3_bucket, Key=obj["Key"])["Body"]
+            for line in body.iter_lines():
+                if not line:
+                    continue
+                record = _json_loads(line)
+                idx = int(record["recordId"])
+                if "modelOutput" in record:
+                    results[idx] = _parse_embed_response(record["modelOutput"])
+                else:
+                    results[idx] = RuntimeError(f"Batch record failed: {record.get('error')}")
+
+    for i, vec in enumerate(results):
+        if vec is None:
+            results[i] = RuntimeError(f"No batch output for record {i}")
+        if isinstance(results[i], Exception) and not return_exceptions:
+            raise results[i]
+    return results
+
+
+# Content-keyed image embedding memo: Zillow re-lists and agents reuse the same
+# photo under different URLs, which the URL-keyed DynamoDB cache can't see.
+_IMAGE_EMBED_LRU = _DigestLRU(IMAGE_EMBED_LRU_SIZE)
 
 
 def embed_image_bytes(img_bytes: bytes) -> List[float]:
     """
     Generate an image embedding vector using Amazon Bedrock Titan Image Embeddings.
+    Results are memoized in-process by image content, so identical photos
+    served from different URLs are only embedded once per container.
 
     Args:
         img_bytes: Raw image bytes (JPEG, PNG, etc.)
@@ -224,19 +691,56 @@ def embed_image_bytes(img_bytes: bytes) -> List[float]:
     Returns:
         1024-dimensional vector representing the visual features of the image
     """
-    # Encode image to base64 (required by Titan Image Embeddings)
-    b64 = base64.b64encode(img_bytes).decode("utf-8")
+    key = _IMAGE_EMBED_LRU.bytes_key(img_bytes)
+    cached = _IMAGE_EMBED_LRU.get(key)
+    if cached is not None:
+        return cached.tolist()
 
     # Invoke Titan Image Embeddings model
-    # Format: {"inputImage": "base64string"}
-    body = json.dumps({"inputImage": b64})
+    # Format: {"inputImage": "base64string"}; base64 output is JSON-safe ASCII,
+    # so the body is built directly as bytes without a str decode or json.dumps
+    body = b'{"inputImage":"' + base64.b64encode(img_bytes) + b'"}'
     resp = brt.invoke_model(modelId=IMAGE_MODEL_ID, body=body)
-    out = json.loads(resp["body"].read().decode("utf-8"))
+    out = _json_loads(resp["body"].read())
 
     # Titan Image returns {"embedding": [floats], "inputImageDimensions": {...}}
-    if "embedding" in out:
-        return out["embedding"]
-    return _parse_embed_response(out)
+    vec = _frozen_vector(_parse_embed_response(out))
+    _IMAGE_EMBED_LRU.put(key, vec)
+    return vec.tolist()
+
+
+def embed_text_np(text: str, multimodal: bool = False) -> np.ndarray:
+    """
+    ndarray variant of embed_text()/embed_text_multimodal() for numeric callers.
+
+    Args:
+        text: Input text to embed
+        multimodal: Use the multimodal Titan model (same space as image vectors)
+
+    Returns:
+        float32 array (zeros for empty/whitespace text)
+    """
+    vec = embed_text_multimodal(text) if multimodal else embed_text(text)
+    return np.asarray(vec, dtype=np.float32)
+
+
+def fetch_image_bytes(url: str, timeout: float = 8) -> bytes:
+    """
+    Download an image over the shared pooled HTTP session.
+
+    Args:
+        url: Image URL
+        timeout: Request timeout in seconds
+
+    Returns:
+        Raw image bytes
+
+    Raises:
+        requests.HTTPError: For non-2xx responses (after transient-error retries)
+    """
+    resp = http_session.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.content
 
 
 # NOTE: embed_image_from_url() removed - was never used in production
@@ -258,86 +762,365 @@ def vec_mean(vectors: List[List[float]], target_dim: int) -> List[float]:
     Returns:
         Mean vector with same dimension as input vectors
     """
-    if not vectors:
-        return [0.0] * target_dim
+    return vec_mean_np(vectors, target_dim).tolist()
 
-    dim = len(vectors[0])
-    sums = [0.0] * dim
 
-    # Sum all vectors element-wise
-    for v in vectors:
-        for i in range(dim):
-            sums[i] += v[i]
+def vec_mean_np(vectors: List[List[float]], target_dim: int) -> np.ndarray:
+    """
+    NumPy variant of vec_mean() for callers that keep working on the array
+    (e.g. L2-normalizing in place) without a list round-trip.
 
-    # Divide by count to get mean
-    return [s / len(vectors) for s in sums]
+    Args:
+        vectors: List of embedding vectors (or a 2-D array) to average
+        target_dim: Dimension of output vector (for zero vector fallback)
 
+    Returns:
+        float32 array with the element-wise mean
+    """
+    if len(vectors) == 0:
+        return np.zeros(target_dim, dtype=np.float32)
 
-# NOTE: _get_cached_labels() and _cache_labels() removed
-# These legacy functions are replaced by detect_labels() which caches comprehensive analysis
-# See git history if restoration is needed
+    # Single contiguous float32 reduction instead of a Python loop per dimension
+    return np.asarray(vectors, dtype=np.float32).mean(axis=0)
 
 
-def detect_labels(img_bytes: bytes, image_url: str = "", max_labels: int = 100) -> Dict[str, Any]:
+def is_nonzero_vector(vec) -> bool:
     """
-    LEGACY: Comprehensive vision analysis using Claude 3 Haiku.
+    Return True if vec has any non-zero component.
 
-    **DEPRECATED:** New code should use detect_labels_with_response() instead,
-    which returns both the analysis AND raw LLM response for better caching.
+    Zero vectors (empty text, failed embeddings) must not be indexed: cosine
+    similarity is undefined for them and they only add dead HNSW nodes.
+    """
+    return vec is not None and len(vec) > 0 and bool(np.any(np.asarray(vec, dtype=np.float32)))
 
-    This function is kept for backwards compatibility with existing code that
-    hasn't been updated to use the new unified caching system (cache_utils.py).
 
-    Analyzes a single property image and extracts EVERYTHING in one pass:
-    - All visible features and amenities
-    - Architecture style (if exterior)
-    - Exterior colors and materials
-    - Room type identification
-    - Whether image is interior or exterior
+def combine_image_embeddings(vectors: List[List[float]], target_dim: int) -> np.ndarray:
+    """
+    Combine a property's image embeddings into one L2-normalized float32 vector.
 
-    Cost: ~$0.00025 per image (Haiku)
+    Stacks the vectors into one (N, dim) array, averages and normalizes it in
+    place. The array is returned as-is: orjson serializes it straight into the
+    bulk payload without building a list of Python floats.
 
     Args:
-        img_bytes: Raw image bytes
-        image_url: URL of the image (for logging/debugging)
-        max_labels: Maximum number of features to return (default 100)
+        vectors: List of image embedding vectors
+        target_dim: Dimension of output vector (for zero vector fallback)
 
     Returns:
-        Dictionary with:
-        {
-            "features": ["pool", "granite countertops", ...],
-            "image_type": "exterior" or "interior",
-            "architecture_style": "modern" or null,
-            "exterior_color": "blue" or null,
-            "materials": ["brick", "stone"],
-            "visual_features": ["balcony", "porch"],
-            "confidence": "high" or "medium" or "low"
-        }
+        Unit-length float32 mean vector, or zeros when there are no (or only zero) vectors
+    """
+    mean = vec_mean_np(vectors, target_dim)
+    norm = float(np.linalg.norm(mean))
+    if norm > 0.0:
+        mean /= norm
+    return mean
+
+
+def quantize_vector(vec: List[float], peak: Optional[float] = None) -> List[int]:
+    """
+    Quantize a float vector to int8 range for Lucene byte knn_vector fields.
+
+    By default each vector is scaled so its largest component maps to +/-127.
+    Cosine similarity is scale-invariant, so per-vector scaling keeps the most
+    precision without changing the ranking metric. Inner product is not, so
+    callers pass a fixed peak to scale every vector identically.
+
+    Args:
+        vec: Float embedding vector
+        peak: Value mapped to 127 (per-vector max magnitude when omitted)
+
+    Returns:
+        List of ints in [-128, 127] with the same dimension
+    """
+    arr = np.asarray(vec, dtype=np.float32)
+    if peak is None:
+        peak = float(np.abs(arr).max()) if arr.size else 0.0
+    if peak == 0.0:
+        return [0] * arr.size
+    return np.clip(np.rint(arr * (127.0 / peak)), -128, 127).astype(np.int8).tolist()
+
+
+def normalize_vector(vec: List[float]) -> List[float]:
+    """
+    Scale a vector to unit L2 length (zero vectors are returned as zeros).
+
+    Args:
+        vec: Float embedding vector
+
+    Returns:
+        Unit-length vector as a list of floats
+    """
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    if norm > 0.0:
+        arr = arr / norm
+    return arr.tolist()
+
+
+def index_vector(vec: List[float]) -> List[float]:
+    """
+    Convert an embedding to the representation stored in (and queried against) the index.
+
+    Args:
+        vec: Float embedding vector
+
+    Returns:
+        vec unchanged for float cosinesimil indexes; unit-normalized when
+        OS_KNN_SPACE=innerproduct; int8-quantized when OS_VECTOR_DTYPE=byte
+    """
+    if OS_KNN_SPACE == "innerproduct":
+        vec = normalize_vector(vec)
+        if OS_VECTOR_DTYPE == "byte":
+            # One shared scale for every vector keeps dot products comparable
+            return quantize_vector(vec, peak=OS_BYTE_IP_PEAK)
+    if OS_VECTOR_DTYPE == "byte":
+        return quantize_vector(vec)
+    return vec
+
+
+def knn_clause(vec: List[float], k: int) -> Dict[str, Any]:
+    """
+    Build the per-field body of a kNN query ({"vector": ..., "k": ...}).
+
+    Args:
+        vec: Float query embedding
+        k: Number of nearest neighbors per shard
+
+    Returns:
+        Query dict with the vector in index representation, plus ef_search when HNSW_EFS is set
+    """
+    clause = {"vector": index_vector(vec), "k": k}
+    if HNSW_EFS > 0:
+        clause["method_parameters"] = {"ef_search": HNSW_EFS}
+    return clause
+
+
+# ===============================================
+# LLM INVOCATION
+# ===============================================
+
+_EPHEMERAL = {"type": "ephemeral"}
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+
+@functools.lru_cache(maxsize=32)
+def _system_blocks(system: str) -> Tuple[Dict[str, Any], ...]:
+    """
+    System prompt content blocks, built once per static prompt.
+
+    Prompts are module constants, so the block (with its cache_control
+    checkpoint) is shared across calls. Serializers accept the tuple as a
+    JSON array; callers must not mutate it.
+    """
+    block = {"type": "text", "text": system}
+    if LLM_PROMPT_CACHING:
+        block["cache_control"] = _EPHEMERAL
+    return (block,)
+
+
+def _json_object_end(text: str, start: int, state: List[int]) -> int:
+    """
+    Scan text[start:] for the end of the first top-level JSON object.
+
+    state is [depth, in_string, escaped, seen_open], carried across calls so
+    the text can be fed incrementally. Returns the index just past the closing
+    brace, or -1 if the object isn't complete yet.
+    """
+    depth, in_string, escaped, seen_open = state
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = 0
+            elif c == "\\":
+                escaped = 1
+            elif c == '"':
+                in_string = 0
+        elif c == '"' and seen_open:
+            in_string = 1
+        elif c == "{":
+            depth += 1
+            seen_open = 1
+        elif c == "}" and seen_open:
+            depth -= 1
+            if depth == 0:
+                state[:] = [depth, in_string, escaped, seen_open]
+                return i + 1
+    state[:] = [depth, in_string, escaped, seen_open]
+    return -1
+
+
+def _invoke_llm_streaming(model_id: str, body: Dict[str, Any], stop_after_json: bool) -> Dict[str, Any]:
     """
+    Stream a Claude response and assemble it into the invoke_model response shape.
 
-    # Analyze with Claude Haiku
+    Text deltas are accumulated as they arrive; with stop_after_json the stream
+    is closed once the first top-level JSON object is complete, skipping any
+    trailing commentary the model would otherwise generate.
+    """
+    resp = brt.invoke_model_with_response_stream(modelId=model_id, body=_json_dumps(body))
+    stream = resp["body"]
+    parts: List[str] = []
+    text = ""
+    scanned = 0
+    scan_state = [0, 0, 0, 0]
+    usage: Dict[str, Any] = {}
+    stop_reason = None
     try:
-        b64_image = base64.b64encode(img_bytes).decode("utf-8")
+        for event in stream:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            data = _json_loads(chunk["bytes"])
+            kind = data.get("type")
+            if kind == "message_start":
+                usage.update(data.get("message", {}).get("usage", {}))
+            elif kind == "content_block_delta":
+                parts.append(data.get("delta", {}).get("text", ""))
+                if stop_after_json:
+                    text = "".join(parts)
+                    end = _json_object_end(text, scanned, scan_state)
+                    scanned = len(text)
+                    if end != -1:
+                        parts = [text[:end]]
+                        stop_reason = "json_complete"
+                        break
+            elif kind == "message_delta":
+                usage.update(data.get("usage", {}))
+                stop_reason = data.get("delta", {}).get("stop_reason", stop_reason)
+    finally:
+        stream.close()
+    return {
+        "content": [{"type": "text", "text": "".join(parts)}],
+        "usage": usage,
+        "stop_reason": stop_reason,
+    }
 
-        payload = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 800,  # Increased for comprehensive analysis
-            "temperature": 0,   # Consistent results for caching
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": b64_image
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": """Analyze this property photo comprehensively. Extract ALL valuable information for real estate search.
+
+def invoke_llm_with_cache(system: Optional[str], messages: List[Dict[str, Any]], tools: List[Dict[str, Any]] = None,
+                          max_tokens: int = 512, temperature: float = 0,
+                          model_id: str = LLM_MODEL_ID, json_only: bool = False) -> Dict[str, Any]:
+    """
+    Invoke a Claude model on Bedrock with the static prefix marked for prompt caching.
+
+    The system prompt (and the last tool definition, if any) carry a
+    cache_control checkpoint when LLM_PROMPT_CACHING is enabled, so repeat
+    calls only pay full input price for the varying messages. Cache token
+    usage is logged at DEBUG to track the hit ratio.
+
+    Args:
+        system: Static system prompt (the cached prefix); None sends no system block
+        messages: Anthropic messages list (dynamic part)
+        tools: Optional tool definitions (cached together with the system prompt)
+        max_tokens: Maximum output tokens
+        temperature: Sampling temperature (0 = deterministic)
+        model_id: Bedrock model ID
+        json_only: The answer is a single JSON object; with LLM_STREAMING the
+            response is streamed and cut off as soon as that object closes
+
+    Returns:
+        Parsed Anthropic response dict (content, usage, stop_reason, ...)
+    """
+    body = {
+        "anthropic_version": ANTHROPIC_VERSION,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "messages": messages,
+    }
+    if system:
+        body["system"] = _system_blocks(system)
+    if tools:
+        if LLM_PROMPT_CACHING:
+            tools = tools[:-1] + [{**tools[-1], "cache_control": _EPHEMERAL}]
+        body["tools"] = tools
+
+    if LLM_STREAMING and json_only and not tools:
+        result = _invoke_llm_streaming(model_id, body, stop_after_json=True)
+    else:
+        resp = brt.invoke_model(modelId=model_id, body=_json_dumps(body))
+        result = _json_loads(resp["body"].read())
+
+    usage = result.get("usage", {})
+    if LLM_PROMPT_CACHING and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "LLM prompt cache: read=%s created=%s uncached_input=%s",
+            usage.get("cache_read_input_tokens", 0),
+            usage.get("cache_creation_input_tokens", 0),
+            usage.get("input_tokens", 0),
+        )
+    return result
+
+
+def _llm_cache_key(*parts: str) -> str:
+    """
+    Build a DynamoDB LLM cache key from the model, prompt and input text.
+
+    Including the static prompt means prompt edits invalidate old entries.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for part in (LLM_MODEL_ID,) + parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _llm_cache_get(key: str) -> Optional[Any]:
+    """
+    Look up a parsed LLM result in LLM_CACHE_TABLE.
+
+    Args:
+        key: Key from _llm_cache_key()
+
+    Returns:
+        The cached value, or None if disabled, missing, expired or unreadable
+    """
+    if not LLM_CACHE_TABLE:
+        return None
+    try:
+        item = dynamodb.get_item(TableName=LLM_CACHE_TABLE, Key={"k": {"S": key}}).get("Item")
+        # DynamoDB TTL deletion is lazy, so check expiry on read as well
+        if item and int(item.get("ttl", {}).get("N", "0")) > time.time():
+            return _json_loads(item["v"]["S"])
+    except Exception as e:
+        logger.debug(f"LLM cache read failed: {e}")
+    return None
+
+
+def _llm_cache_put(key: str, value: Any):
+    """
+    Store a parsed LLM result in LLM_CACHE_TABLE for LLM_CACHE_TTL_DAYS (non-fatal on failure).
+
+    Args:
+        key: Key from _llm_cache_key()
+        value: JSON-serializable result
+    """
+    if not LLM_CACHE_TABLE:
+        return
+    try:
+        dynamodb.put_item(TableName=LLM_CACHE_TABLE, Item={
+            "k": {"S": key},
+            "v": {"S": _json_dumps(value).decode("utf-8")},
+            "ttl": {"N": str(int(time.time()) + LLM_CACHE_TTL_DAYS * 86400)},
+        })
+    except Exception as e:
+        logger.warning(f"LLM cache write failed: {e}")
+
+
+# NOTE: _get_cached_labels() and _cache_labels() removed
+# These legacy functions are replaced by detect_labels() which caches comprehensive analysis
+# See git history if restoration is needed
+
+
+# ===============================================
+# VISION ANALYSIS PROMPTS
+# ===============================================
+
+# Static instruction prompts sent with every property photo. They are module
+# constants so the request prefix is byte-identical across calls, which is what
+# Bedrock prompt caching keys on.
+
+# Full prompt with tiered architecture style classification (detect_labels)
+_VISION_PROMPT_TIERED = """Analyze this property photo comprehensively. Extract ALL valuable information for real estate search.
 
 STEP 1: Determine if this is EXTERIOR or INTERIOR
 - Exterior: Shows outside of building, facade, yard, architectural features
@@ -413,135 +1196,9 @@ Return STRICT JSON format:
 }
 
 IMPORTANT: Be thorough. A good analysis should have 30-50+ features for a detailed photo."""
-                        }
-                    ]
-                }
-            ]
-        }
-
-        response = brt.invoke_model(
-            modelId=LLM_MODEL_ID,  # Claude 3 Haiku
-            body=json.dumps(payload)
-        )
 
-        result = json.loads(response["body"].read())
-        text = result["content"][0]["text"].strip()
-
-        # Parse JSON response
-        try:
-            analysis = json.loads(text)
-
-            # Ensure all required fields exist with defaults
-            analysis.setdefault("features", [])
-            analysis.setdefault("image_type", "unknown")
-            analysis.setdefault("architecture_style", None)
-            analysis.setdefault("architecture_style_specific", None)
-            analysis.setdefault("architecture_confidence", 0.0)
-            analysis.setdefault("exterior_color", None)
-            analysis.setdefault("materials", [])
-            analysis.setdefault("visual_features", [])
-            analysis.setdefault("confidence", "medium")
-
-            # Normalize all strings to lowercase
-            analysis["features"] = [f.lower().strip() for f in analysis["features"] if f]
-            analysis["materials"] = [m.lower().strip() for m in analysis["materials"] if m]
-            analysis["visual_features"] = [v.lower().strip() for v in analysis["visual_features"] if v]
-            if analysis["architecture_style"]:
-                analysis["architecture_style"] = analysis["architecture_style"].lower().replace(" ", "_")
-            if analysis["exterior_color"]:
-                analysis["exterior_color"] = analysis["exterior_color"].lower()
-
-            # Limit features if needed
-            if len(analysis["features"]) > max_labels:
-                analysis["features"] = analysis["features"][:max_labels]
-
-            logger.debug(f"Comprehensive analysis: {len(analysis['features'])} features, type={analysis['image_type']}, style={analysis['architecture_style']}")
-
-        except json.JSONDecodeError as e:
-            # Fallback: create minimal structure
-            logger.warning(f"JSON parse failed for {image_url}: {e}, falling back to basic parsing")
-            analysis = {
-                "features": [label.strip().lower() for label in text.split(",") if label.strip()][:max_labels],
-                "image_type": "unknown",
-                "architecture_style": None,
-                "exterior_color": None,
-                "materials": [],
-                "visual_features": [],
-                "confidence": "low"
-            }
-
-        # No caching here - use detect_labels_with_response() + cache_utils for caching
-        return analysis
-
-    except Exception as e:
-        logger.warning(f"Comprehensive vision analysis failed for {image_url}: {e}")
-        return {
-            "features": [],
-            "image_type": "unknown",
-            "architecture_style": None,
-            "exterior_color": None,
-            "materials": [],
-            "visual_features": [],
-            "confidence": "low"
-        }
-
-
-def detect_labels_with_response(img_bytes: bytes, image_url: str = "", max_labels: int = 100) -> Dict[str, Any]:
-    """
-    Comprehensive vision analysis that returns both parsed analysis AND raw LLM response.
-
-    This function is used by the new unified caching system (cache_utils.py) to enable:
-    - Storing both the parsed analysis and raw LLM response atomically
-    - Debugging failed parses by inspecting raw LLM output
-    - Re-parsing without re-calling the LLM
-
-    The actual caching to hearth-vision-cache is done by cache_utils.cache_image_data()
-    in the calling code.
-
-    Args:
-        img_bytes: Raw image bytes
-        image_url: URL of the image (for logging/debugging)
-        max_labels: Maximum number of features to return (default 100)
-
-    Returns:
-        Dictionary with:
-        {
-            "analysis": {
-                "features": [...],
-                "image_type": "exterior" or "interior",
-                "architecture_style": "modern" or null,
-                "exterior_color": "blue" or null,
-                "materials": [...],
-                "visual_features": [...],
-                "confidence": "high"/"medium"/"low"
-            },
-            "llm_response": "raw response text from Claude"
-        }
-    """
-    # Always call LLM - no old cache fallback
-    # Analyze with Claude Haiku
-    try:
-        b64_image = base64.b64encode(img_bytes).decode("utf-8")
-
-        payload = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 800,
-            "temperature": 0,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": b64_image
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": """Analyze this property photo comprehensively. Extract ALL valuable information for real estate search.
+# Prompt used by detect_labels_with_response (production ingest path)
+_VISION_PROMPT = """Analyze this property photo comprehensively. Extract ALL valuable information for real estate search.
 
 STEP 1: Determine if this is EXTERIOR or INTERIOR
 - Exterior: Shows outside of building, facade, yard, architectural features
@@ -596,118 +1253,323 @@ Return STRICT JSON format:
   "visual_features": ["balcony", "porch", ...],
   "confidence": "high" or "medium" or "low"
 }"""
-                        }
-                    ]
+
+
+def _vision_content(b64_image: str, prompt: str) -> List[Dict[str, Any]]:
+    """
+    Build the user message content for a Claude vision call.
+
+    With LLM_PROMPT_CACHING enabled, the static prompt goes first and carries a
+    cache_control checkpoint so only the image is billed at the full input rate.
+    Otherwise the original image-then-instructions order is kept.
+
+    Args:
+        b64_image: Base64-encoded JPEG image
+        prompt: Static instruction prompt
+
+    Returns:
+        List of content blocks for messages[0].content
+    """
+    image_block = {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": "image/jpeg",
+            "data": b64_image
+        }
+    }
+    if LLM_PROMPT_CACHING:
+        return [
+            {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}},
+            image_block
+        ]
+    return [image_block, {"type": "text", "text": prompt}]
+
+
+# Default values for every field of a parsed vision analysis. List fields use
+# tuples so the shared defaults can never be mutated through a merged dict.
+_DETECT_DEFAULTS: Dict[str, Any] = {
+    "features": (),
+    "image_type": "unknown",
+    "architecture_style": None,
+    "architecture_style_specific": None,
+    "architecture_confidence": 0.0,
+    "exterior_color": None,
+    "materials": (),
+    "visual_features": (),
+    "confidence": "medium",
+}
+
+
+def _normalize_labels(values: Iterable[str]) -> List[str]:
+    """Lowercase and strip a list of labels, dropping empty entries."""
+    return [v.lower().strip() for v in values if v]
+
+
+def _fallback_analysis(features: List[str]) -> Dict[str, Any]:
+    """Minimal low-confidence analysis used when the LLM call or JSON parse fails."""
+    return {
+        "features": features,
+        "image_type": "unknown",
+        "architecture_style": None,
+        "exterior_color": None,
+        "materials": [],
+        "visual_features": [],
+        "confidence": "low"
+    }
+
+
+def _call_vision_llm(img_bytes: bytes, image_url: str = "", max_labels: int = 100,
+                     prompt: str = _VISION_PROMPT) -> Tuple[Dict[str, Any], str, bool]:
+    """
+    Run a single Claude Haiku vision analysis and parse the structured result.
+
+    Shared implementation behind detect_labels() and detect_labels_with_response().
+    Bedrock throttling is re-raised so _with_bedrock_retry() can back off; any
+    other Bedrock or parse failure produces a low-confidence fallback.
+
+    Args:
+        img_bytes: Raw image bytes
+        image_url: URL of the image (for logging/debugging)
+        max_labels: Maximum number of features to return
+        prompt: Static instruction prompt to send with the image
+
+    Returns:
+        Tuple of (analysis dict, raw LLM response text, True if the analysis is the fallback)
+    """
+    try:
+        b64_image = base64.b64encode(img_bytes).decode("utf-8")
+
+        payload = {
+            "anthropic_version": ANTHROPIC_VERSION,
+            "max_tokens": VISION_MAX_TOKENS,  # Comprehensive analysis JSON
+            "temperature": 0,   # Consistent results for caching
+            "messages": [
+                {
+                    "role": "user",
+                    "content": _vision_content(b64_image, prompt)
                 }
             ]
         }
 
         response = brt.invoke_model(
-            modelId=LLM_MODEL_ID,
-            body=json.dumps(payload)
+            modelId=LLM_MODEL_ID,  # Claude 3 Haiku
+            body=_json_dumps(payload)
         )
 
-        result = json.loads(response["body"].read())
+        result = _json_loads(response["body"].read())
         text = result["content"][0]["text"].strip()
 
-        # Store raw response
-        llm_response = text
+        # Parse JSON response
+        try:
+            # Fill missing fields from the defaults in a single merge
+            analysis = {**_DETECT_DEFAULTS, **_parse_llm_json(text)}
+
+            # Normalize all strings to lowercase (and cap the feature list)
+            analysis["features"] = _normalize_labels(analysis["features"])[:max_labels]
+            analysis["materials"] = _normalize_labels(analysis["materials"])
+            analysis["visual_features"] = _normalize_labels(analysis["visual_features"])
+            if analysis["architecture_style"]:
+                analysis["architecture_style"] = analysis["architecture_style"].lower().replace(" ", "_")
+            if analysis["exterior_color"]:
+                analysis["exterior_color"] = analysis["exterior_color"].lower()
+
+            logger.debug(f"Comprehensive analysis: {len(analysis['features'])} features, type={analysis['image_type']}, style={analysis['architecture_style']}")
+
+        except json.JSONDecodeError as e:
+            # Fallback: create minimal structure
+            logger.warning(f"JSON parse failed for {image_url}: {e}, falling back to basic parsing")
+            analysis = _fallback_analysis(
+                [label.strip().lower() for label in text.split(",") if label.strip()][:max_labels]
+            )
+            return analysis, text, True
+
+        return analysis, text, False
+
+    except Exception as e:
+        if any(code in str(e) for code in _BEDROCK_RETRYABLE):
+            raise  # Let the caller's retry wrapper back off
+        logger.warning(f"Comprehensive vision analysis failed for {image_url}: {e}")
+        return _fallback_analysis([]), "", True
+
+
+def detect_labels(img_bytes: bytes, image_url: str = "", max_labels: int = 100) -> Dict[str, Any]:
+    """
+    LEGACY: Comprehensive vision analysis using Claude 3 Haiku.
+
+    **DEPRECATED:** New code should use detect_labels_with_response() instead,
+    which returns both the analysis AND raw LLM response for better caching.
+
+    This function is kept for backwards compatibility with existing code that
+    hasn't been updated to use the new unified caching system (cache_utils.py).
+
+    Analyzes a single property image and extracts EVERYTHING in one pass:
+    - All visible features and amenities
+    - Architecture style (if exterior)
+    - Exterior colors and materials
+    - Room type identification
+    - Whether image is interior or exterior
+
+    Cost: ~$0.00025 per image (Haiku)
+
+    Args:
+        img_bytes: Raw image bytes
+        image_url: URL of the image (for logging/debugging)
+        max_labels: Maximum number of features to return (default 100)
+
+    Returns:
+        Dictionary with:
+        {
+            "features": ["pool", "granite countertops", ...],
+            "image_type": "exterior" or "interior",
+            "architecture_style": "modern" or null,
+            "exterior_color": "blue" or null,
+            "materials": ["brick", "stone"],
+            "visual_features": ["balcony", "porch"],
+            "confidence": "high" or "medium" or "low"
+        }
+    """
+    # No caching here - use detect_labels_with_response() + cache_utils for caching
+    return _with_bedrock_retry(_call_vision_llm, img_bytes, image_url, max_labels, _VISION_PROMPT_TIERED)[0]
 
-        # Parse JSON response
-        try:
-            analysis = json.loads(text)
-
-            # Ensure all required fields exist with defaults
-            analysis.setdefault("features", [])
-            analysis.setdefault("image_type", "unknown")
-            analysis.setdefault("architecture_style", None)
-            analysis.setdefault("architecture_style_specific", None)
-            analysis.setdefault("architecture_confidence", 0.0)
-            analysis.setdefault("exterior_color", None)
-            analysis.setdefault("materials", [])
-            analysis.setdefault("visual_features", [])
-            analysis.setdefault("confidence", "medium")
-
-            # Normalize all strings to lowercase
-            analysis["features"] = [f.lower().strip() for f in analysis["features"] if f]
-            analysis["materials"] = [m.lower().strip() for m in analysis["materials"] if m]
-            analysis["visual_features"] = [v.lower().strip() for v in analysis["visual_features"] if v]
-            if analysis["architecture_style"]:
-                analysis["architecture_style"] = analysis["architecture_style"].lower().replace(" ", "_")
-            if analysis["exterior_color"]:
-                analysis["exterior_color"] = analysis["exterior_color"].lower()
 
-            # Limit features if needed
-            if len(analysis["features"]) > max_labels:
-                analysis["features"] = analysis["features"][:max_labels]
+def detect_labels_with_response(img_bytes: bytes, image_url: str = "", max_labels: int = 100) -> Dict[str, Any]:
+    """
+    Comprehensive vision analysis that returns both parsed analysis AND raw LLM response.
 
-            logger.debug(f"Comprehensive analysis: {len(analysis['features'])} features, type={analysis['image_type']}, style={analysis['architecture_style']}")
+    This function is used by the new unified caching system (cache_utils.py) to enable:
+    - Storing both the parsed analysis and raw LLM response atomically
+    - Debugging failed parses by inspecting raw LLM output
+    - Re-parsing without re-calling the LLM
 
-        except json.JSONDecodeError as e:
-            # Fallback: create minimal structure
-            logger.warning(f"JSON parse failed for {image_url}: {e}, falling back to basic parsing")
-            analysis = {
-                "features": [label.strip().lower() for label in text.split(",") if label.strip()][:max_labels],
-                "image_type": "unknown",
-                "architecture_style": None,
-                "exterior_color": None,
-                "materials": [],
-                "visual_features": [],
-                "confidence": "low"
-            }
+    The actual caching to hearth-vision-cache is done by cache_utils.cache_image_data()
+    in the calling code.
 
-        return {"analysis": analysis, "llm_response": llm_response}
+    Args:
+        img_bytes: Raw image bytes
+        image_url: URL of the image (for logging/debugging)
+        max_labels: Maximum number of features to return (default 100)
 
-    except Exception as e:
-        logger.warning(f"Comprehensive vision analysis failed for {image_url}: {e}")
-        return {
+    Returns:
+        Dictionary with:
+        {
             "analysis": {
-                "features": [],
-                "image_type": "unknown",
-                "architecture_style": None,
-                "exterior_color": None,
-                "materials": [],
-                "visual_features": [],
-                "confidence": "low"
+                "features": [...],
+                "image_type": "exterior" or "interior",
+                "architecture_style": "modern" or null,
+                "exterior_color": "blue" or null,
+                "materials": [...],
+                "visual_features": [...],
+                "confidence": "high"/"medium"/"low"
             },
-            "llm_response": ""
+            "llm_response": "raw response text from Claude",
+            "fallback": True if the analysis is the low-confidence fallback (don't cache it)
         }
 
+    Raises:
+        Bedrock throttling errors (wrap in _with_bedrock_retry(), as
+        embed_and_analyze_image() does)
+    """
+    # Always call LLM - no old cache fallback
+    analysis, llm_response, fallback = _call_vision_llm(img_bytes, image_url, max_labels, prompt=_VISION_PROMPT)
+    return {"analysis": analysis, "llm_response": llm_response, "fallback": fallback}
+
+def embed_and_analyze_image(img_bytes: bytes, image_url: str = "") -> Tuple[List[float], Dict[str, Any]]:
+    """
+    Embed and analyze one image from a single in-memory copy of its bytes.
+
+    The Titan image embedding runs on the shared Bedrock pool while the Claude
+    vision analysis runs on the calling thread, so the two round-trips overlap.
+    Both calls retry Bedrock throttling. If the vision call still ends in the
+    low-confidence fallback, the result carries "fallback": True and callers
+    should not cache it.
+
+    Args:
+        img_bytes: Raw image bytes
+        image_url: Source URL (for logging in the vision call)
+
+    Returns:
+        (embedding, {"analysis": ..., "llm_response": ..., "fallback": ...}) as
+        returned by embed_image_bytes() and detect_labels_with_response()
+    """
+    vec_future = _BRT_POOL.submit(_with_bedrock_retry, embed_image_bytes, img_bytes)
+    analysis_result = _with_bedrock_retry(detect_labels_with_response, img_bytes, image_url)
+    return vec_future.result(), analysis_result
+
+
 # ===============================================
 # OPENSEARCH INDEX MANAGEMENT
 # ===============================================
 
-def create_index_if_needed():
-    """
-    Create the OpenSearch index with proper mappings if it doesn't exist.
+# Settings begin_bulk_load() relaxes and finalize_index() puts back
+_BULK_LOAD_KEYS = ("refresh_interval", "number_of_replicas", "translog.durability")
 
-    This sets up the schema for property listings with:
-    - Text fields for BM25 full-text search
-    - Keyword fields for exact filtering
-    - Numeric fields for range queries (price, beds, baths)
-    - Geo-point for location-based search
-    - kNN vector fields for semantic similarity search
-    - Boolean flags for data quality tracking
+# Indexes known to exist in this process (skips the HEAD round-trip on warm Lambdas)
+_INDEX_READY = set()
+_INDEX_READY_LOCK = threading.Lock()
 
-    The index uses HNSW (Hierarchical Navigable Small World) algorithm for
-    fast approximate nearest neighbor search on high-dimensional vectors.
 
-    Schema Version Detection:
-    - "listings" → Legacy single-vector schema (backward compatible)
-    - "listings-v2" → Multi-vector schema with all image embeddings stored separately
+def forget_index_ready(index: str = OS_INDEX):
+    """Drop an index from the in-process existence cache (call after deleting it)."""
+    with _INDEX_READY_LOCK:
+        _INDEX_READY.discard(index)
+
+
+def _knn_vector_field(dimension: int) -> Dict[str, Any]:
     """
-    if os_client.indices.exists(index=OS_INDEX):
-        return  # Index already exists
+    Build a knn_vector mapping using HNSW (Lucene, or faiss when OS_KNN_ENGINE=faiss)
+    with cosine similarity (or inner product over unit vectors when OS_KNN_SPACE=innerproduct).
 
-    logger.info("Creating OpenSearch index %s", OS_INDEX)
+    Args:
+        dimension: Vector dimension
 
-    # Detect if this is the new multi-vector schema
-    is_multi_vector = OS_INDEX.endswith("-v2")
+    Returns:
+        Field mapping dict (byte vectors when OS_VECTOR_DTYPE=byte,
+        scalar-quantized storage when OS_KNN_ENCODER=sq)
+    """
+    field = {
+        "type": "knn_vector",
+        "dimension": dimension,
+        "method": {
+            "name": "hnsw",  # Fast approximate nearest neighbor algorithm
+            "engine": OS_KNN_ENGINE,  # Lucene implementation (default) or faiss
+            "space_type": OS_KNN_SPACE,  # Cosine similarity metric (default)
+            "parameters": {
+                "m": HNSW_M,  # Graph out-degree
+                "ef_construction": HNSW_EFC  # Build-time candidate list size
+            }
+        }
+    }
+    if OS_VECTOR_DTYPE == "byte":
+        field["data_type"] = "byte"  # int8 vectors (see quantize_vector)
+    elif OS_KNN_ENCODER == "sq":
+        encoder = {"name": "sq"}  # Quantized graph storage
+        if OS_KNN_ENGINE == "faiss":
+            encoder["parameters"] = {"type": "fp16"}
+        field["method"]["parameters"]["encoder"] = encoder
+    return field
 
+
+def _build_index_body(is_multi_vector: bool) -> Dict[str, Any]:
+    """
+    Build the index settings + mappings for one schema version.
+
+    Args:
+        is_multi_vector: True for the listings-v2 nested image_vectors schema,
+                         False for the legacy single vector_image schema
+
+    Returns:
+        Request body for indices.create
+    """
     body = {
         "settings": {
             "index": {
-                "knn": True  # Enable k-nearest neighbors search
+                "knn": True,  # Enable k-nearest neighbors search
+                "number_of_shards": OS_SHARDS,
+                "number_of_replicas": 0,  # No replica fan-out during the initial load
+                "refresh_interval": OS_REFRESH_INTERVAL,  # Batch refreshes during ingest
+                "translog.durability": "async",  # fsync translog in the background while loading
+                "translog.flush_threshold_size": "1gb"  # Fewer translog flushes under bulk load
             }
         },
         "mappings": {
@@ -737,20 +1599,13 @@ def create_index_if_needed():
                 "description": {"type": "text"},  # Original/fallback description
                 "llm_profile": {"type": "text"},  # LLM-normalized description (deprecated, always empty)
                 "visual_features_text": {"type": "text"},  # Generated from image analyses (NEW)
-                "feature_tags": {"type": "keyword"},  # Extracted features (pool, garage, etc.)
-                "image_tags": {"type": "keyword"},  # Vision-detected labels (kitchen, brick, etc.)
+                # Tag fields are only term-filtered (never sorted/aggregated): no doc_values
+                "feature_tags": {"type": "keyword", "doc_values": False},  # Extracted features (pool, garage, etc.)
+                "image_tags": {"type": "keyword", "doc_values": False},  # Vision-detected labels (kitchen, brick, etc.)
                 "architecture_style": {"type": "keyword"},  # Architecture style (modern, craftsman, etc.)
 
                 # Vector embeddings for semantic search
-                "vector_text": {
-                    "type": "knn_vector",
-                    "dimension": TEXT_DIM,  # 1024 dimensions
-                    "method": {
-                        "name": "hnsw",  # Fast approximate nearest neighbor algorithm
-                        "engine": "lucene",  # Lucene implementation
-                        "space_type": "cosinesimil"  # Cosine similarity metric
-                    }
-                },
+                "vector_text": _knn_vector_field(TEXT_DIM),  # 1024 dimensions
 
                 # Data quality flags
                 "has_valid_embeddings": {"type": "boolean"},  # True if vectors are non-zero
@@ -762,6 +1617,9 @@ def create_index_if_needed():
         }
     }
 
+    if OS_BULK_ROUTING:
+        body["settings"]["index"]["bulk_routing"] = OS_BULK_ROUTING
+
     # Add image vector field(s) based on schema version
     if is_multi_vector:
         # PHASE 2: Multi-vector schema for listings-v2
@@ -771,29 +1629,58 @@ def create_index_if_needed():
             "properties": {
                 "image_url": {"type": "keyword"},  # URL of the image
                 "image_type": {"type": "keyword"},  # "exterior", "interior", "kitchen", "bathroom", etc.
-                "vector": {
-                    "type": "knn_vector",
-                    "dimension": IMAGE_DIM,  # 1024 dimensions
-                    "method": {
-                        "name": "hnsw",
-                        "engine": "lucene",
-                        "space_type": "cosinesimil"
-                    }
-                }
+                "vector": _knn_vector_field(IMAGE_DIM)  # 1024 dimensions
             }
         }
-        logger.info("Creating listings-v2 with MULTI-VECTOR image schema (Phase 2)")
     else:
         # LEGACY: Single averaged vector for backward compatibility
-        body["mappings"]["properties"]["vector_image"] = {
-            "type": "knn_vector",
-            "dimension": IMAGE_DIM,  # 1024 dimensions
-            "method": {
-                "name": "hnsw",
-                "engine": "lucene",
-                "space_type": "cosinesimil"
-            }
-        }
+        body["mappings"]["properties"]["vector_image"] = _knn_vector_field(IMAGE_DIM)  # 1024 dimensions
+
+    return body
+
+
+# Index bodies are built once at import; create_index_if_needed() picks one by OS_INDEX suffix
+_INDEX_BODY_V1 = _build_index_body(is_multi_vector=False)
+_INDEX_BODY_V2 = _build_index_body(is_multi_vector=True)
+
+
+def create_index_if_needed():
+    """
+    Create the OpenSearch index with proper mappings if it doesn't exist.
+
+    This sets up the schema for property listings with:
+    - Text fields for BM25 full-text search
+    - Keyword fields for exact filtering
+    - Numeric fields for range queries (price, beds, baths)
+    - Geo-point for location-based search
+    - kNN vector fields for semantic similarity search
+    - Boolean flags for data quality tracking
+
+    The index uses HNSW (Hierarchical Navigable Small World) algorithm for
+    fast approximate nearest neighbor search on high-dimensional vectors.
+
+    Schema Version Detection:
+    - "listings" → Legacy single-vector schema (backward compatible)
+    - "listings-v2" → Multi-vector schema with all image embeddings stored separately
+    """
+    if OS_INDEX in _INDEX_READY:
+        return  # Already checked/created in this process
+
+    with _INDEX_READY_LOCK:
+        if OS_INDEX in _INDEX_READY:
+            return
+        if os_client.indices.exists(index=OS_INDEX):
+            _INDEX_READY.add(OS_INDEX)
+            return  # Index already exists
+
+    logger.info("Creating OpenSearch index %s", OS_INDEX)
+
+    # Detect if this is the new multi-vector schema
+    is_multi_vector = OS_INDEX.endswith("-v2")
+    body = _INDEX_BODY_V2 if is_multi_vector else _INDEX_BODY_V1
+    if is_multi_vector:
+        logger.info("Creating listings-v2 with MULTI-VECTOR image schema (Phase 2)")
+    else:
         logger.info("Creating legacy index with SINGLE-VECTOR image schema")
 
     # Create index with error handling for race conditions in parallel processing
@@ -807,6 +1694,105 @@ def create_index_if_needed():
         else:
             # Re-raise any other errors
             raise
+    _INDEX_READY.add(OS_INDEX)
+
+
+def _index_settings(index: str, keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    Read the current values of some index settings.
+
+    Args:
+        index: Index name
+        keys: Flat setting names under "index" (e.g. "translog.durability")
+
+    Returns:
+        {key: value}, with None for settings left at the cluster default
+    """
+    current = os_client.indices.get_settings(index=index, flat_settings=True)
+    flat = next(iter(current.values()), {}).get("settings", {})
+    return {k: flat.get(f"index.{k}") for k in keys}
+
+
+def begin_bulk_load() -> Dict[str, Any]:
+    """
+    Switch an existing index to bulk-load settings before an ingest job.
+
+    New indexes are already created this way; this covers re-ingesting into a
+    live index. Refresh is relaxed to OS_REFRESH_INTERVAL ("-1" disables it),
+    replicas drop to 0 and the translog fsyncs asynchronously.
+    finalize_index() is the matching end-of-load call.
+
+    An index still in the create-time load state (0 replicas, async translog)
+    has no serving settings to return to, so its restore target is
+    OS_REPLICAS with default refresh and durability.
+
+    Returns:
+        Settings to hand to finalize_index(restore=...) (JSON-serializable)
+    """
+    restore = _index_settings(OS_INDEX, _BULK_LOAD_KEYS)
+    if str(restore["number_of_replicas"]) == "0" and restore["translog.durability"] == "async":
+        restore = {"refresh_interval": None, "number_of_replicas": OS_REPLICAS, "translog.durability": None}
+    os_client.indices.put_settings(index=OS_INDEX, body={
+        "index": {
+            "refresh_interval": OS_REFRESH_INTERVAL,
+            "number_of_replicas": 0,
+            "translog.durability": "async"
+        }
+    })
+    logger.info(f"Bulk-load settings applied to {OS_INDEX} (refresh_interval={OS_REFRESH_INTERVAL}, "
+                f"replicas=0, was {restore})")
+    return restore
+
+
+def finalize_index(refresh_interval: str = "1s", restore: Optional[Dict[str, Any]] = None):
+    """
+    Switch the index from bulk-load to serving settings once an ingest job ends.
+
+    Bulk requests are sent with refresh=False, so this puts back the serving
+    refresh interval, replicas and translog durability, issues a single
+    explicit refresh, and optionally force-merges to one segment.
+
+    Args:
+        refresh_interval: Refresh interval to set when no restore settings are given
+        restore: Settings recorded by begin_bulk_load(); None values reset to
+                 the cluster default. Without them the index gets
+                 refresh_interval, OS_REPLICAS and request durability.
+    """
+    if restore is None:
+        restore = {"refresh_interval": refresh_interval, "number_of_replicas": OS_REPLICAS,
+                   "translog.durability": "request"}
+    os_client.indices.put_settings(index=OS_INDEX, body={"index": restore})
+    os_client.indices.refresh(index=OS_INDEX)
+    if OS_FORCEMERGE:
+        os_client.indices.forcemerge(index=OS_INDEX, max_num_segments=1, request_timeout=600)
+    logger.info(f"Finalized index {OS_INDEX} ({restore})")
+
+
+@contextmanager
+def ingest_mode(index: str = OS_INDEX):
+    """
+    Disable refresh and replicas on an index for the duration of a bulk write.
+
+    For self-contained jobs (scripts, one-shot bulk_upsert calls). The chained
+    upload Lambda spans many invocations and uses begin_bulk_load() /
+    finalize_index() instead. The prior values are read first and restored on
+    exit, followed by one refresh; settings that were unset are reset to the
+    cluster default.
+
+    Args:
+        index: Index to put into ingest mode
+    """
+    restore = _index_settings(index, ("refresh_interval", "number_of_replicas"))
+    os_client.indices.put_settings(index=index, body={
+        "index": {"refresh_interval": "-1", "number_of_replicas": 0}
+    })
+    logger.info(f"Ingest mode on for {index} (was {restore})")
+    try:
+        yield
+    finally:
+        os_client.indices.put_settings(index=index, body={"index": restore})
+        os_client.indices.refresh(index=index)
+        logger.info(f"Ingest mode off for {index}")
 
 
 def upsert_listing(doc_id: str, body: Dict[str, Any]):
@@ -819,12 +1805,56 @@ def upsert_listing(doc_id: str, body: Dict[str, Any]):
     """
     os_client.index(index=OS_INDEX, id=doc_id, body=body, refresh=False)
 
-def _send_bulk(chunk_lines: List[str], attempt: int = 0, base_sleep: float = 0.5, max_sleep: float = 8.0):
+# Cluster-wide pause shared by all bulk workers: a 429 in one thread delays
+# every sender until the backoff deadline instead of each retrying on its own.
+_BULK_PAUSE_UNTIL = 0.0
+_BULK_PAUSE_LOCK = threading.Lock()
+
+
+def _pause_bulk(seconds: float):
+    """Push the shared bulk pause deadline at least `seconds` into the future."""
+    global _BULK_PAUSE_UNTIL
+    with _BULK_PAUSE_LOCK:
+        _BULK_PAUSE_UNTIL = max(_BULK_PAUSE_UNTIL, time.monotonic() + seconds)
+
+
+def _wait_for_bulk_pause():
+    """Block until the shared bulk pause (if any) has elapsed."""
+    delay = _BULK_PAUSE_UNTIL - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+# Bulk action line prefix/suffix: only _id varies per document, so the line is
+# assembled from these constants instead of serializing a dict each time.
+_ACTION_HEAD = b'{"index":{"_index":' + _json_dumps(OS_INDEX) + b',"_id":"'
+_ACTION_TAIL = b'"}}\n'
+
+
+def _action_line(doc_id: Any) -> bytes:
+    """Build the newline-terminated bulk action line for one document."""
+    doc_id = str(doc_id)
+    # zpids are numeric; anything needing JSON escaping takes the slow path
+    if doc_id.isascii() and doc_id.isprintable() and '"' not in doc_id and "\\" not in doc_id:
+        return _ACTION_HEAD + doc_id.encode("ascii") + _ACTION_TAIL
+    return _json_dumps({"index": {"_index": OS_INDEX, "_id": doc_id}}) + b"\n"
+
+
+def _retry_after_seconds(e: Exception) -> Optional[float]:
+    """Retry-After (seconds) from a throttled OpenSearch error, as recorded by _RetryAfterConnection."""
+    value = getattr(e, "retry_after", None)
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError):
+        return None  # HTTP-date form isn't worth parsing here; fall back to backoff
+
+
+def _send_bulk(payload: bytes, attempt: int = 0, base_sleep: float = 0.5, max_sleep: float = 8.0):
     """
     Send a bulk indexing request to OpenSearch with exponential backoff retry logic.
 
     Args:
-        chunk_lines: OpenSearch bulk API format (action line + doc line pairs)
+        payload: Newline-terminated NDJSON bytes, OpenSearch bulk API format (action line + doc line pairs)
         attempt: Current retry attempt number (for exponential backoff calculation)
         base_sleep: Base sleep time in seconds
         max_sleep: Maximum sleep time in seconds
@@ -835,14 +1865,16 @@ def _send_bulk(chunk_lines: List[str], attempt: int = 0, base_sleep: float = 0.5
     Raises:
         Exception: For non-retryable errors
     """
-    payload = "\n".join(chunk_lines) + "\n"
+    _wait_for_bulk_pause()
     try:
-        # Changed to refresh=True to make documents immediately searchable
-        response = os_client.bulk(body=payload, refresh=True, request_timeout=60)
+        # No per-batch refresh; finalize_index() refreshes once at the end of the job
+        response = os_client.bulk(body=payload, refresh=False, request_timeout=60)
 
-        # Enhanced logging: Log full response structure for debugging
-        logger.info(f"🔍 Bulk API response keys: {list(response.keys())}")
-        logger.info(f"   errors={response.get('errors')}, took={response.get('took')}ms, items_count={len(response.get('items', []))}")
+        items = response.get("items", [])
+        verbose = OS_BULK_VERBOSE or logger.isEnabledFor(logging.DEBUG)
+        logger.info("Bulk response: errors=%s, took=%sms, items=%d", response.get("errors"), response.get("took"), len(items))
+        if verbose:
+            logger.info(f"🔍 Bulk API response keys: {list(response.keys())}")
 
         # Check for errors in bulk response
         if response.get("errors"):
@@ -851,47 +1883,122 @@ def _send_bulk(chunk_lines: List[str], attempt: int = 0, base_sleep: float = 0.5
             successful_zpids = []
             failed_zpids = []
             logger.error("Bulk indexing had errors!")
-            for item in response.get("items", []):
-                for action, details in item.items():
-                    zpid = details.get("_id")
-                    if details.get("error"):
-                        error_count += 1
-                        failed_zpids.append(zpid)
-                        logger.error("Failed to index zpid %s: %s", zpid, details.get("error"))
-                    else:
-                        success_count += 1
-                        successful_zpids.append(zpid)
-                        # Log the actual response status for successful items
-                        logger.info(f"   zpid={zpid}: status={details.get('status')}, result={details.get('result')}")
+            for item in items:
+                # Each bulk item has exactly one key (index/create/update/delete)
+                details = next(iter(item.values()))
+                zpid = details.get("_id")
+                if details.get("error"):
+                    error_count += 1
+                    failed_zpids.append(zpid)
+                    logger.error("Failed to index zpid %s: %s", zpid, details.get("error"))
+                else:
+                    success_count += 1
+                    successful_zpids.append(zpid)
+                    if verbose:
+                        logger.info("   zpid=%s: status=%s, result=%s", zpid, details.get("status"), details.get("result"))
             logger.info("Bulk result: %d succeeded, %d failed", success_count, error_count)
             logger.info("   Successful zpids: %s", successful_zpids[:10])
             logger.error("   Failed zpids: %s", failed_zpids[:10])
             # Still return True to continue processing (partial success)
-        else:
-            item_count = len(response.get("items", []))
-            logger.info("Bulk indexed %d documents successfully", item_count)
+        elif verbose:
             # Log first few zpids for verification with their status
             zpids_with_status = []
-            for item in response.get("items", []):
-                for _, details in item.items():
-                    zpid = details.get("_id")
-                    status = details.get("status")
-                    result = details.get("result")
-                    zpids_with_status.append(f"{zpid}(s={status},r={result})")
-            logger.info(f"   Successfully indexed zpids: {zpids_with_status[:10]}")
+            for item in items[:10]:
+                details = next(iter(item.values()))
+                zpids_with_status.append(f"{details.get('_id')}(s={details.get('status')},r={details.get('result')})")
+            logger.info(f"   Successfully indexed zpids: {zpids_with_status}")
         return True
     except Exception as e:
         status = getattr(e, "status_code", None)
         # Retry on rate limits and temporary server errors
         if status in (429, 502, 503, 504) or "Too Many Requests" in str(e):
-            # Exponential backoff: 0.5s, 1s, 2s, 4s, 8s... + jitter
-            sleep = min(base_sleep * (2 ** attempt), max_sleep) + random.uniform(0, 0.3)
-            time.sleep(sleep)
+            retry_after = _retry_after_seconds(e)
+            if retry_after is not None:
+                sleep = min(retry_after, max_sleep)  # Server-specified wait takes precedence
+            else:
+                # Exponential backoff: 0.5s, 1s, 2s, 4s, 8s... + jitter (exponent capped so huge
+                # attempt counts can't build giant ints)
+                sleep = min(base_sleep * (1 << min(attempt, 6)), max_sleep) + random.uniform(0, 0.3)
+            _pause_bulk(sleep)  # Hold back the other workers too
+            _wait_for_bulk_pause()
             return False  # Signal caller to retry
         raise  # Non-retryable error
 
 
-def bulk_upsert(actions: Iterable[Dict[str, Any]], initial_chunk: int = 100, max_retries: int = 6):
+def _parallel_bulk(actions: Iterable[Dict[str, Any]], chunk_size: int) -> List[Dict[str, Any]]:
+    """
+    Index documents over concurrent bulk streams with helpers.parallel_bulk.
+
+    Chunks are bounded by document count and encoded byte size. Rate-limited/5xx
+    items are returned so the caller can re-send them through the serial backoff
+    path; any other failure is raised once the stream has been drained.
+
+    Not usable on AWS Lambda (see BULK_THREADS).
+
+    Args:
+        actions: Iterator of documents to index, each with {"_id": ..., "_source": {...}}
+        chunk_size: Maximum documents per bulk request
+
+    Returns:
+        Actions that failed with a retryable status (429/5xx)
+
+    Raises:
+        The first request-level exception (connection, auth, ...) if any chunk
+        failed outright, else RuntimeError if documents were rejected
+    """
+    # Only actions still in flight are held: entries are popped as results arrive
+    by_id: Dict[str, Dict[str, Any]] = {}
+
+    def op_stream():
+        for a in actions:
+            by_id[str(a["_id"])] = a
+            yield {"_op_type": "index", "_index": OS_INDEX, "_id": a["_id"], "_source": a["_source"]}
+
+    ok_count = 0
+    retryable: List[Dict[str, Any]] = []
+    failed: List[Dict[str, Any]] = []
+    for ok, item in helpers.parallel_bulk(
+        os_client,
+        op_stream(),
+        thread_count=BULK_THREADS,
+        queue_size=max(BULK_QUEUE_SIZE, 1),
+        chunk_size=chunk_size,
+        max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+        raise_on_error=False,
+        raise_on_exception=False,
+        refresh=False,
+        request_timeout=60,
+    ):
+        details = next(iter(item.values()))
+        zpid = str(details.get("_id"))
+        action = by_id.pop(zpid, None)
+        if ok:
+            ok_count += 1
+            continue
+        details.pop("data", None)  # Don't hold the document body in the failure list
+        status = details.get("status")
+        if status in (429, 502, 503, 504) and action is not None:
+            retryable.append(action)
+        else:
+            logger.error("Failed to index zpid %s: %s", zpid, details.get("error"))
+            failed.append(details)
+
+    logger.info("Parallel bulk result: %d succeeded, %d queued for retry, %d failed",
+                ok_count, len(retryable), len(failed))
+    if failed:
+        # Same contract as _send_bulk: non-retryable errors reach the caller.
+        # With raise_on_exception=False a failed request is reported per item
+        # with the original exception attached; re-raise that when present.
+        exc = next((d["exception"] for d in failed if isinstance(d.get("exception"), BaseException)), None)
+        if exc is not None:
+            raise exc
+        raise RuntimeError(f"parallel bulk failed for {len(failed)} documents "
+                           f"(first zpid {failed[0].get('_id')}: {failed[0].get('error')})")
+    return retryable
+
+
+def bulk_upsert(actions: Iterable[Dict[str, Any]], initial_chunk: int = BULK_CHUNK_DOCS, max_retries: int = 6,
+                bulk_load: bool = False):
     """
     Robustly index multiple documents to OpenSearch with automatic chunking and retry logic.
 
@@ -902,75 +2009,155 @@ def bulk_upsert(actions: Iterable[Dict[str, Any]], initial_chunk: int = 100, max
     - Error handling for individual document failures
 
     The algorithm:
-    1. Buffer documents up to initial_chunk size (default 100)
+    0. If BULK_THREADS > 1, stream everything through helpers.parallel_bulk
+       first; only throttled/5xx items fall through to the serial path below
+    1. Serialize each document once and buffer up to the current chunk size
+       (starts at initial_chunk) or BULK_MAX_CHUNK_BYTES of payload, whichever comes first
     2. Send bulk request
     3. If rate limited, retry with exponential backoff
     4. If still failing after max_retries/2, split chunk in half and retry each half
     5. Continue until all documents indexed or unrecoverable error
 
+    Chunk size adapts to bulk responses: every split halves the size used for
+    new batches (floor 25 docs), and each clean first-attempt send grows it by
+    1.5x up to BULK_CHUNK_DOCS_MAX, so a healthy cluster converges on fewer,
+    larger requests while BULK_MAX_CHUNK_BYTES still caps the payload.
+
+    Batches in step 2+ are flushed by BULK_WORKERS threads fed from a bounded
+    queue; a 429 in any worker pauses all of them for the backoff period. When
+    step 0 ran, its parallel streams are the only concurrency and the retry
+    tail is flushed on the calling thread.
+
     Args:
         actions: Iterator of documents to index, each with {"_id": ..., "_source": {...}}
-        initial_chunk: Initial batch size (will auto-reduce if throttled)
+        initial_chunk: Initial batch size, default BULK_CHUNK_DOCS (adapts to throttling/clean sends)
         max_retries: Maximum retry attempts before splitting or failing
+        bulk_load: Wrap this call in ingest_mode() (refresh/replicas off, restored
+                   after). Leave False when the caller manages settings itself.
     """
-    def lines_from_actions(acts: List[Dict[str, Any]]) -> List[str]:
-        """Convert action dicts to OpenSearch bulk API format."""
-        lines = []
-        for a in acts:
-            # Action line: {"index": {"_index": "listings", "_id": "12345"}}
-            lines.append(json.dumps({"index": {"_index": OS_INDEX, "_id": a["_id"]}}))
-            # Document line: {actual document fields}
-            lines.append(json.dumps(a["_source"]))
-        return lines
-
-    buf: List[Dict[str, Any]] = []
+    if bulk_load:
+        with ingest_mode(OS_INDEX):
+            return bulk_upsert(actions, initial_chunk=initial_chunk, max_retries=max_retries)
+
+    def lines_for_action(a: Dict[str, Any]) -> bytes:
+        """Serialize one action to its OpenSearch bulk API line pair (newline-terminated NDJSON bytes)."""
+        # Action line: {"index": {"_index": "listings", "_id": "12345"}}
+        # Document line: {actual document fields}
+        # One join sizes the result up front; no intermediate bytearray copy
+        return b"".join((_action_line(a["_id"]), _json_dumps(a["_source"]), b"\n"))
+
+    # Buffer holds pre-serialized NDJSON entries so retries/splits never re-encode documents
+    buf: List[bytes] = []
+    buf_bytes = 0
     chunk_size = initial_chunk
+    min_chunk = min(25, initial_chunk)
+    max_chunk = max(BULK_CHUNK_DOCS_MAX, initial_chunk)
+    chunk_lock = threading.Lock()  # Workers adapt chunk_size concurrently
 
-    def flush(buf_local: List[Dict[str, Any]]):
+    def flush(buf_local: List[bytes]):
         """Flush buffered documents with retry and split logic."""
-        if not buf_local:
-            return
-
-        logger.info(f"Indexing batch: {len(buf_local)} documents to {OS_INDEX}")
-        lines = lines_from_actions(buf_local)
-
-        # Try to send with retries
-        for attempt in range(max_retries):
-            if _send_bulk(lines, attempt=attempt):
-                return  # Success!
+        nonlocal chunk_size
+        # Iterative work list instead of recursion: split halves are pushed to
+        # the front so documents are still sent in their original order.
+        work = deque([buf_local])
+        while work:
+            chunk = work.popleft()
+            if not chunk:
+                continue
 
-            # If repeatedly throttled at halfway point, split the batch
-            if attempt == max_retries // 2 and len(buf_local) > 1:
-                mid = len(buf_local) // 2
-                flush(buf_local[:mid])  # Recursively flush first half
-                flush(buf_local[mid:])  # Recursively flush second half
+            logger.info(f"Indexing batch: {len(chunk)} documents to {OS_INDEX}")
+            payload = b"".join(chunk)
+
+            # Try to send with retries
+            split = False
+            for attempt in range(max_retries):
+                if _send_bulk(payload, attempt=attempt):
+                    if attempt == 0:
+                        with chunk_lock:
+                            chunk_size = min(max_chunk, chunk_size * 3 // 2 + 1)
+                    break  # Success!
+
+                # If repeatedly throttled at halfway point, split the batch
+                if attempt == max_retries // 2 and len(chunk) > 1:
+                    split = True
+                    break
+            else:
+                # Still failing after all retries - try splitting as last resort
+                if len(chunk) <= 1:
+                    # Single document failing repeatedly - give up
+                    raise RuntimeError("bulk_upsert failed after retries for a single document")
+                split = True
+
+            if split:
+                # Multiplicative decrease for batches not yet buffered
+                with chunk_lock:
+                    chunk_size = max(min_chunk, chunk_size // 2)
+                    new_size = chunk_size
+                logger.info(f"Throttled: splitting {len(chunk)}-doc batch, chunk size now {new_size}")
+                mid = len(chunk) // 2
+                work.appendleft(chunk[mid:])  # Second half
+                work.appendleft(chunk[:mid])  # First half goes next
+
+    parallel = BULK_THREADS > 1
+    if parallel:
+        actions = _parallel_bulk(actions, chunk_size)
+        if actions:
+            # The cluster just pushed back; let it drain before the retry pass
+            _pause_bulk(0.5 + random.uniform(0, 0.3))
+
+    # Worker pool: this thread produces batches into a bounded queue (backpressure)
+    # while BULK_WORKERS threads flush them concurrently. Skipped after parallel
+    # streams, which leave only a small throttled tail to re-send.
+    batches: "queue.Queue" = queue.Queue(maxsize=2 * max(BULK_WORKERS, 1))
+    errors: List[BaseException] = []
+
+    def worker():
+        while True:
+            batch = batches.get()
+            if batch is None:
                 return
-
-        # Still failing after all retries - try splitting as last resort
-        if len(buf_local) > 1:
-            mid = len(buf_local) // 2
-            flush(buf_local[:mid])
-            flush(buf_local[mid:])
-        else:
-            # Single document failing repeatedly - give up
-            raise RuntimeError("bulk_upsert failed after retries for a single document")
-
-    # Main loop: buffer and flush
-    for a in actions:
-        buf.append(a)
-        if len(buf) >= chunk_size:
-            flush(buf)
-            buf = []
-
-    # Flush remaining documents
-    if buf:
-        flush(buf)
+            if errors:
+                continue  # Another worker failed; drain without sending
+            try:
+                flush(batch)
+            except BaseException as e:  # Surface to the caller after join
+                errors.append(e)
+
+    workers = []
+    if BULK_WORKERS > 1 and not parallel:
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(BULK_WORKERS)]
+        for t in workers:
+            t.start()
+    submit = batches.put if workers else flush
+
+    # Main loop: buffer and flush by document count or encoded payload size
+    try:
+        for a in actions:
+            entry = lines_for_action(a)
+            buf.append(entry)
+            buf_bytes += len(entry)
+            if len(buf) >= chunk_size or buf_bytes >= BULK_MAX_CHUNK_BYTES:
+                submit(buf)
+                buf = []
+                buf_bytes = 0
+
+        # Flush remaining documents
+        if buf:
+            submit(buf)
+    finally:
+        for _ in workers:
+            batches.put(None)
+        for t in workers:
+            t.join()
+
+    if errors:
+        raise errors[0]
 
 # ===============================================
 # ZILLOW DATA PARSING & LLM FEATURE EXTRACTION
 # ===============================================
 
-def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> List[str]:
+def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576, max_images: int = 0) -> List[str]:
     """
     Extract image URLs from a Zillow listing at optimal resolution for embeddings.
 
@@ -982,16 +2169,32 @@ def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> L
         listing: Raw Zillow listing dictionary
         target_width: Target image width in pixels (default 576px for embeddings)
                      Common values: 384, 576, 768
+        max_images: Stop once this many URLs are collected (0 = unlimited)
 
     Returns:
         List of unique image URLs at target resolution
     """
-    urls = []
+    urls: List[str] = []
+    seen_urls = set()  # Normalized URLs already collected (avoids duplicate Bedrock calls)
+
+    def add_url(u: str):
+        if not isinstance(u, str) or not u:
+            return
+        # Ignore query strings/fragments (cache-busting params) when comparing
+        key = u.split("?", 1)[0].split("#", 1)[0]
+        if key not in seen_urls:
+            seen_urls.add(key)
+            urls.append(u)
+
+    def full() -> bool:
+        return bool(max_images) and len(urls) >= max_images
 
     # Primary source: carouselPhotosComposable (deduplicated images)
     carousel = listing.get("carouselPhotosComposable", [])
     if carousel:
         for photo in carousel:
+            if full():
+                break
             # Get optimal resolution URL from this photo for embeddings
             if isinstance(photo, dict):
                 # Try to get URL from image field (usually highest res)
@@ -1003,29 +2206,30 @@ def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> L
                     # Prefer jpeg over webp for compatibility
                     jpeg_sources = ms.get("jpeg", [])
                     if jpeg_sources and isinstance(jpeg_sources, list):
-                        # Find closest resolution to target (prefer exact or slightly larger)
-                        best_match = None
-                        min_diff = float('inf')
+                        # Single pass: smallest width >= target, else largest width below it
+                        best_ge = None
+                        best_ge_w = float('inf')
+                        best_lt = None
+                        best_lt_w = -1
 
                         for source in jpeg_sources:
-                            if isinstance(source, dict) and "width" in source and "url" in source:
-                                width = source.get("width", 0)
-                                # Prefer slightly larger than target over smaller
-                                diff = abs(width - target_width)
-                                if width >= target_width and diff < min_diff:
-                                    best_match = source
-                                    min_diff = diff
-                                elif not best_match:  # Fallback to smaller if no larger available
-                                    best_match = source
-                                    min_diff = diff
-
+                            if not (isinstance(source, dict) and "width" in source and "url" in source):
+                                continue
+                            width = source["width"] or 0
+                            if width >= target_width:
+                                if width < best_ge_w:
+                                    best_ge, best_ge_w = source, width
+                            elif width > best_lt_w:
+                                best_lt, best_lt_w = source, width
+
+                        best_match = best_ge or best_lt
                         if best_match:
-                            urls.append(best_match["url"])
+                            add_url(best_match["url"])
                             continue
 
                 # Fallback to direct URL if no mixedSources
                 if url and isinstance(url, str):
-                    urls.append(url)
+                    add_url(url)
 
         if urls:
             return urls
@@ -1033,7 +2237,7 @@ def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> L
     # Fallback 1: imgSrc (main thumbnail image)
     img_src = listing.get("imgSrc")
     if img_src and isinstance(img_src, str):
-        urls.append(img_src)
+        add_url(img_src)
 
     # Fallback 2: responsivePhotos - extract highest resolution from each unique photo
     # WARNING: For lots/vacant land, responsivePhotos may contain nearby home images!
@@ -1049,6 +2253,8 @@ def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> L
     if responsive and not (is_vacant_land and photo_count == 0):
         seen_photos = set()  # Track photo IDs to avoid duplicates
         for photo in responsive:
+            if full():
+                break
             if not isinstance(photo, dict):
                 continue
 
@@ -1065,19 +2271,21 @@ def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> L
                 # Get the largest resolution
                 largest = max(jpeg_sources, key=lambda x: x.get("width", 0) if isinstance(x, dict) else 0)
                 if isinstance(largest, dict) and "url" in largest:
-                    urls.append(largest["url"])
+                    add_url(largest["url"])
 
     # Fallback 3: Simple image arrays
     for key in ["images", "photos", "photoUrls"]:
         val = listing.get(key)
         if isinstance(val, list) and not urls:
             for it in val:
+                if full():
+                    break
                 if isinstance(it, dict) and "url" in it:
-                    urls.append(it["url"])
+                    add_url(it["url"])
                 elif isinstance(it, str):
-                    urls.append(it)
+                    add_url(it)
 
-    return urls if urls else []
+    return urls[:max_images] if max_images else urls
 
 
 # NOTE: classify_architecture_style_vision() removed - replaced by unified detect_labels()
@@ -1088,31 +2296,60 @@ def extract_zillow_images(listing: Dict[str, Any], target_width: int = 576) -> L
 
 
 
-def extract_query_constraints(query_text: str) -> Dict[str, Any]:
-    """
-    Parse structured constraints from natural language search query using Claude LLM.
+# Keyword tables for the extract_query_constraints() fallback (used when the LLM
+# call fails). Matched in order; the first architecture/POI hit wins.
+_DRIVE_RE = re.compile(r'(\d+)\s*minute')
+_FEATURE_KEYWORDS = (
+    (("pool",), "pool"),
+    (("kitchen island", "island"), "kitchen_island"),
+    (("backyard",), "backyard"),
+    (("balcony",), "balcony"),
+    (("fence",), "fence"),
+)
+_ARCH_KEYWORDS = (
+    (("mid century modern", "mid-century modern"), "mid_century_modern"),
+    (("modern",), "modern"),
+    (("craftsman",), "craftsman"),
+    (("victorian",), "victorian"),
+    (("colonial",), "colonial"),
+    (("ranch",), "ranch"),
+    (("contemporary",), "contemporary"),
+)
+_PROXIMITY_KEYWORDS = ("near", "close to", "within", "from")
+_POI_KEYWORDS = (
+    (("school",), "school"),
+    (("grocery", "supermarket"), "grocery_store"),
+    (("gym", "fitness"), "gym"),
+    (("park",), "park"),
+    (("office",), "office"),
+)
 
-    This extracts multiple types of constraints from queries like
-    "3 bedroom modern house with pool under $500k near a school":
-    - must_have: Required feature tags (e.g., ["pool", "balcony", "blue_exterior"])
-    - nice_to_have: Preferred features (e.g., ["garage"])
-    - hard_filters: Numeric constraints (e.g., {"beds_min": 3, "price_max": 500000})
-    - architecture_style: Architecture style if mentioned (e.g., "modern", "craftsman")
-    - proximity: Location-based requirements (e.g., {"poi_type": "school", "max_distance_km": 5})
+# Every fallback keyword in one alternation, scanned once per query. The
+# zero-width lookahead reports a match at each start position, so overlapping
+# keywords ("mid century modern" and "modern") are all found, matching the
+# substring semantics of `k in q`. Longest first so no keyword hides a longer one.
+_ALL_KEYWORDS = {
+    k
+    for table in (_FEATURE_KEYWORDS, _ARCH_KEYWORDS, _POI_KEYWORDS)
+    for keywords, _ in table
+    for k in keywords
+} | set(_PROXIMITY_KEYWORDS) | {"elementary"}
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_ALL_KEYWORDS, key=len, reverse=True)) + "))"
+)
 
-    The LLM intelligently interprets natural language and converts it to
-    structured filters that OpenSearch can use.
 
-    Args:
-        query_text: Natural language search query from user
+def _first_keyword_match(found, table) -> Any:
+    """Return the value of the first (keywords, value) entry with a keyword in found."""
+    for keywords, value in table:
+        if any(k in found for k in keywords):
+            return value
+    return None
 
-    Returns:
-        Dictionary with keys: must_have (list), nice_to_have (list), hard_filters (dict),
-        architecture_style (str or null), proximity (dict or null)
-    """
-    try:
-        prompt = f"""
-From the user's search query, extract:
+
+# Static instruction prompt for _llm_query_constraints(). A module constant so the
+# request prefix is byte-identical across queries (what prompt caching keys on).
+_QUERY_CONSTRAINTS_PROMPT = """From the user's search query, extract:
 
 1. must_have: ONLY property features explicitly mentioned (snake_case). Examples:
    - Structural: balcony, porch, deck, patio, fence, white_fence, pool, garage
@@ -1157,11 +2394,11 @@ From the user's search query, extract:
    If uncertain, use the broader Tier 1 style.
 
 5. proximity: If query mentions location/POI, extract:
-   {{
+   {
      "poi_type": "school" | "grocery_store" | "gym" | "fitness_center" | "park" | "hospital" | "office" | "downtown" | etc,
      "max_distance_km": number (estimate: "near"=5, "close to"=3, "within X miles"=X*1.6),
      "max_drive_time_min": number (only if explicit like "10 minute drive")
-   }}
+   }
    Keywords: "near", "close to", "by", "next to", "within X miles/km of"
    If no proximity mentioned, return null.
 
@@ -1175,100 +2412,126 @@ From the user's search query, extract:
 
 Return strict JSON with keys: must_have, nice_to_have, hard_filters, architecture_style, proximity, query_type
 
-Query: "{query_text}"
 """
 
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 512,
-            "temperature": 0,  # Deterministic parsing
-            "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
-        }
 
-        # Invoke Claude via Bedrock
-        resp = brt.invoke_model(modelId=LLM_MODEL_ID, body=json.dumps(body))
-        raw = resp["body"].read().decode("utf-8")
-        parsed = json.loads(raw)
-        text = parsed["content"][0]["text"]
-        j = json.loads(text)  # Parse JSON from Claude's response
-
-        # Normalize architecture style
-        arch_style = j.get("architecture_style")
-        if arch_style:
-            arch_style = str(arch_style).lower().replace(" ", "_")
-
-        # Get proximity and query type
-        proximity = j.get("proximity")
-        query_type = j.get("query_type", "general")
-
-        return {
-            "must_have": [t.strip().lower() for t in j.get("must_have", [])],
-            "nice_to_have": [t.strip().lower() for t in j.get("nice_to_have", [])],
-            "hard_filters": j.get("hard_filters", {}),
-            "architecture_style": arch_style,
-            "proximity": proximity,
-            "query_type": query_type,
-        }
+def _normalize_query_key(query_text: str) -> str:
+    """Lowercase and collapse whitespace so trivial query variants share a cache entry."""
+    return " ".join(query_text.lower().split())
+
+
+@functools.lru_cache(maxsize=CONSTRAINTS_LRU_SIZE)
+def _llm_query_constraints(query_text: str) -> Dict[str, Any]:
+    """
+    LLM half of extract_query_constraints(), memoized per query string.
+
+    Exceptions propagate (and are therefore not cached) so transient Bedrock
+    failures fall back to keyword matching without poisoning the cache.
+    Callers must not mutate the returned dict. Results are also shared across
+    containers through the optional LLM_CACHE_TABLE.
+    """
+    cache_key = _llm_cache_key(_QUERY_CONSTRAINTS_PROMPT, query_text)
+    cached = _llm_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Static instructions go in the (cacheable) system prompt; only the query varies
+    parsed = invoke_llm_with_cache(
+        _QUERY_CONSTRAINTS_PROMPT,
+        [{"role": "user", "content": [{"type": "text", "text": f'Query: "{query_text}"'}]}],
+        max_tokens=512,
+        temperature=0,  # Deterministic parsing
+        json_only=True,
+    )
+    text = parsed["content"][0]["text"]
+    j = _parse_llm_json(text)  # Parse JSON from Claude's response (fences/preamble tolerated)
+
+    # Normalize architecture style
+    arch_style = j.get("architecture_style")
+    if arch_style:
+        arch_style = str(arch_style).lower().replace(" ", "_")
+
+    # Get proximity and query type
+    proximity = j.get("proximity")
+    query_type = j.get("query_type", "general")
+
+    result = {
+        # dict.fromkeys: order-preserving dedup (Claude occasionally repeats a tag)
+        "must_have": list(dict.fromkeys(t.strip().lower() for t in j.get("must_have", []))),
+        "nice_to_have": list(dict.fromkeys(t.strip().lower() for t in j.get("nice_to_have", []))),
+        "hard_filters": j.get("hard_filters", {}),
+        "architecture_style": arch_style,
+        "proximity": proximity,
+        "query_type": query_type,
+    }
+    _llm_cache_put(cache_key, result)
+    return result
+
+
+def _keyword_query_constraints(query_text: str) -> Dict[str, Any]:
+    """Fallback for extract_query_constraints(): simple keyword matching."""
+    q = (query_text or "").lower()
+    found = {m.group(1) for m in _KEYWORD_RE.finditer(q)}  # Single scan of the query
+    must = [tag for keywords, tag in _FEATURE_KEYWORDS if any(k in found for k in keywords)]
+
+    # Extract architecture style from common keywords
+    arch_style = _first_keyword_match(found, _ARCH_KEYWORDS)
+
+    # Extract proximity from common keywords
+    proximity = None
+    if any(k in found for k in _PROXIMITY_KEYWORDS):
+        poi_type = _first_keyword_match(found, _POI_KEYWORDS)
+        if poi_type == "school" and "elementary" in found:
+            poi_type = "elementary_school"
+
+        if poi_type:
+            proximity = {"poi_type": poi_type}
+            # Try to extract drive time
+            drive_match = _DRIVE_RE.search(q)
+            if drive_match:
+                proximity["max_drive_time_min"] = int(drive_match.group(1))
+
+    return {
+        "must_have": list(dict.fromkeys(must)),  # Deterministic order, unlike list(set(...))
+        "nice_to_have": [],
+        "hard_filters": {},
+        "architecture_style": arch_style,
+        "proximity": proximity,
+        "query_type": "general",  # Fallback defaults to general
+    }
+
+
+def extract_query_constraints(query_text: str) -> Dict[str, Any]:
+    """
+    Parse structured constraints from natural language search query using Claude LLM.
+
+    This extracts multiple types of constraints from queries like
+    "3 bedroom modern house with pool under $500k near a school":
+    - must_have: Required feature tags (e.g., ["pool", "balcony", "blue_exterior"])
+    - nice_to_have: Preferred features (e.g., ["garage"])
+    - hard_filters: Numeric constraints (e.g., {"beds_min": 3, "price_max": 500000})
+    - architecture_style: Architecture style if mentioned (e.g., "modern", "craftsman")
+    - proximity: Location-based requirements (e.g., {"poi_type": "school", "max_distance_km": 5})
+
+    The LLM intelligently interprets natural language and converts it to
+    structured filters that OpenSearch can use. Successful LLM parses are
+    memoized in-process, keyed by the case/whitespace-normalized query so
+    trivial variants ("Modern  House" vs "modern house") share one entry;
+    keyword matching is used if the LLM call fails.
+
+    Args:
+        query_text: Natural language search query from user
 
+    Returns:
+        Dictionary with keys: must_have (list), nice_to_have (list), hard_filters (dict),
+        architecture_style (str or null), proximity (dict or null)
+    """
+    try:
+        # Deep copy so callers can mutate the result without touching the cache
+        return copy.deepcopy(_llm_query_constraints(_normalize_query_key(query_text)))
     except Exception as e:
         logger.warning("LLM constraint extraction failed: %s", e)
-        # Fallback: simple keyword matching if LLM fails
-        q = (query_text or "").lower()
-        must = []
-        if "pool" in q: must.append("pool")
-        if "kitchen island" in q or "island" in q: must.append("kitchen_island")
-        if "backyard" in q: must.append("backyard")
-        if "balcony" in q: must.append("balcony")
-        if "fence" in q: must.append("fence")
-
-        # Extract architecture style from common keywords
-        arch_style = None
-        if "mid century modern" in q or "mid-century modern" in q:
-            arch_style = "mid_century_modern"
-        elif "modern" in q:
-            arch_style = "modern"
-        elif "craftsman" in q:
-            arch_style = "craftsman"
-        elif "victorian" in q:
-            arch_style = "victorian"
-        elif "colonial" in q:
-            arch_style = "colonial"
-        elif "ranch" in q:
-            arch_style = "ranch"
-        elif "contemporary" in q:
-            arch_style = "contemporary"
-
-        # Extract proximity from common keywords
-        proximity = None
-        if "near" in q or "close to" in q or "within" in q or "from" in q:
-            poi_type = None
-            if "school" in q:
-                poi_type = "elementary_school" if "elementary" in q else "school"
-            elif "grocery" in q or "supermarket" in q:
-                poi_type = "grocery_store"
-            elif "gym" in q or "fitness" in q:
-                poi_type = "gym"
-            elif "park" in q:
-                poi_type = "park"
-            elif "office" in q:
-                poi_type = "office"
-
-            if poi_type:
-                proximity = {"poi_type": poi_type}
-                # Try to extract drive time
-                import re
-                drive_match = re.search(r'(\d+)\s*minute', q)
-                if drive_match:
-                    proximity["max_drive_time_min"] = int(drive_match.group(1))
-
-        return {
-            "must_have": list(set(must)),
-            "nice_to_have": [],
-            "hard_filters": {},
-            "architecture_style": arch_style,
-            "proximity": proximity,
-            "query_type": "general",  # Fallback defaults to general
-        }
+        return _keyword_query_constraints(query_text)
 
 
 # NOTE: Geocoding functions removed - no longer needed!
@@ -30,15 +30,23 @@ import json
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 import boto3
 
+try:
+    import orjson  # C-accelerated parsing of request bodies (listing payloads can be large)
+except ImportError:  # Fall back to stdlib json when the package isn't bundled
+    orjson = None
+
+from opensearchpy import ConflictError, NotFoundError
+
 from common import (
     os_client, OS_INDEX, AWS_REGION,
     IMAGE_MODEL_ID, LLM_MODEL_ID,
-    embed_text_multimodal, embed_image_bytes, detect_labels_with_response,
-    vec_mean
+    embed_text_multimodal, embed_and_analyze_image,
+    combine_image_embeddings, fetch_image_bytes, index_vector, is_nonzero_vector
 )
 
 logger = logging.getLogger(__name__)
@@ -48,6 +56,20 @@ logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 s3 = boto3.client("s3", region_name=AWS_REGION)
 dynamodb = boto3.client("dynamodb", region_name=AWS_REGION)
 
+# Per-image work for add_listing (up to 10 images), reused across warm invocations
+_IMAGE_POOL = ThreadPoolExecutor(max_workers=10, thread_name_prefix="crud-image")
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so existing handlers still catch it
+_loads_body = orjson.loads if orjson is not None else json.loads
+
+# Painless script for update_listing_handler. Top-level fields are replaced (not
+# deep-merged like a partial "doc" update), then removed, then stamped.
+_UPDATE_SCRIPT = (
+    "for (e in params.updates.entrySet()) { ctx._source[e.getKey()] = e.getValue(); } "
+    "for (f in params.remove_fields) { ctx._source.remove(f); } "
+    "ctx._source.updated_at = params.now;"
+)
+
 # CORS headers for API Gateway
 cors_headers = {
     "Access-Control-Allow-Origin": "*",
@@ -98,7 +120,7 @@ def update_listing_handler(event, context):
     # Parse request body
     try:
         if isinstance(event.get("body"), str):
-            body = json.loads(event["body"])
+            body = _loads_body(event["body"])
         else:
             body = event.get("body", {})
     except json.JSONDecodeError:
@@ -121,30 +143,8 @@ def update_listing_handler(event, context):
     logger.info(f"Updating zpid={zpid} with {len(updates)} fields in index={target_index}")
 
     try:
-        # Fetch existing document
-        response = os_client.get(index=target_index, id=str(zpid))
-
-        if not response.get("found"):
-            return {
-                "statusCode": 404,
-                "headers": cors_headers,
-                "body": json.dumps({"error": f"Listing {zpid} not found"})
-            }
-
-        doc = response["_source"]
-
-        # Apply updates
-        for key, value in updates.items():
-            doc[key] = value
-
-        # Remove fields if requested
+        # Fields to remove if requested (applied after the updates)
         remove_fields = options.get("remove_fields", [])
-        for field in remove_fields:
-            if field in doc:
-                del doc[field]
-
-        # Update timestamp
-        doc["updated_at"] = int(time.time())
 
         # If preserve_embeddings=false, we'd regenerate here
         # For now, always preserve (regeneration is expensive)
@@ -152,8 +152,31 @@ def update_listing_handler(event, context):
         if not preserve_embeddings:
             logger.warning("Embedding regeneration not yet implemented")
 
-        # Update in OpenSearch
-        os_client.index(index=target_index, id=str(zpid), body=doc)
+        # Apply updates, removals and the timestamp server-side in one request: the
+        # stored document (vectors included) never crosses the wire
+        try:
+            os_client.update(
+                index=target_index,
+                id=str(zpid),
+                body={
+                    "script": {
+                        "source": _UPDATE_SCRIPT,
+                        "lang": "painless",
+                        "params": {
+                            "updates": updates,
+                            "remove_fields": remove_fields,
+                            "now": int(time.time())
+                        }
+                    }
+                },
+                retry_on_conflict=3
+            )
+        except NotFoundError:
+            return {
+                "statusCode": 404,
+                "headers": cors_headers,
+                "body": json.dumps({"error": f"Listing {zpid} not found"})
+            }
 
         logger.info(f"Successfully updated zpid={zpid}")
 
@@ -181,6 +204,15 @@ def update_listing_handler(event, context):
 # CREATE LISTING
 # ===============================================
 
+def _already_exists(zpid) -> Dict[str, Any]:
+    """409 response for add_listing_handler when the zpid is taken."""
+    return {
+        "statusCode": 409,
+        "headers": cors_headers,
+        "body": json.dumps({"error": f"Listing {zpid} already exists"})
+    }
+
+
 def add_listing_handler(event, context):
     """
     Add a new listing to the index.
@@ -214,7 +246,7 @@ def add_listing_handler(event, context):
     # Parse request body
     try:
         if isinstance(event.get("body"), str):
-            body = json.loads(event["body"])
+            body = _loads_body(event["body"])
         else:
             body = event.get("body", {})
     except json.JSONDecodeError:
@@ -243,17 +275,17 @@ def add_listing_handler(event, context):
 
     logger.info(f"Adding new listing zpid={zpid} to index={target_index}")
 
-    # Check if zpid already exists
-    try:
-        existing = os_client.get(index=target_index, id=str(zpid))
-        if existing.get("found"):
-            return {
-                "statusCode": 409,
-                "headers": cors_headers,
-                "body": json.dumps({"error": f"Listing {zpid} already exists"})
-            }
-    except:
-        pass  # Listing doesn't exist, continue
+    process_images = options.get("process_images", False)
+    generate_embeddings = options.get("generate_embeddings", True)
+
+    # The create below is what guarantees uniqueness (op_type=create). This HEAD
+    # check only avoids paying for Bedrock work on an obvious duplicate.
+    if process_images or (generate_embeddings and listing_data.get("description")):
+        try:
+            if os_client.exists(index=target_index, id=str(zpid)):
+                return _already_exists(zpid)
+        except Exception as e:
+            logger.warning(f"Existence check failed for zpid={zpid}, relying on create: {e}")
 
     # Build document
     doc = {
@@ -265,9 +297,6 @@ def add_listing_handler(event, context):
         "searchable": True
     }
 
-    process_images = options.get("process_images", False)
-    generate_embeddings = options.get("generate_embeddings", True)
-
     processing_cost = 0.0
 
     try:
@@ -275,8 +304,8 @@ def add_listing_handler(event, context):
         if generate_embeddings and doc.get("description"):
             try:
                 vec_text = embed_text_multimodal(doc["description"])
-                if vec_text:
-                    doc["vector_text"] = vec_text
+                if is_nonzero_vector(vec_text):
+                    doc["vector_text"] = index_vector(vec_text)
                     processing_cost += 0.0001
             except Exception as e:
                 logger.warning(f"Text embedding failed: {e}")
@@ -292,50 +321,47 @@ def add_listing_handler(event, context):
                 image_vector_metadata = []  # For multi-vector schema
                 img_tags = set()
 
+                # Import cache utilities
+                from cache_utils import get_cached_image_data, cache_image_data
+
                 # Process up to 10 images (configurable limit to avoid timeout)
-                for url in image_urls[:10]:
+                urls_to_process = image_urls[:10]
+
+                def _load_image(url: str):
+                    """Cache lookup, else download + embed + analyze + cache. Returns (vec, analysis, cost)."""
+                    cached_data = get_cached_image_data(dynamodb, url)
+                    if cached_data:
+                        logger.debug(f"💾 Cache hit for image: {url[:60]}...")
+                        return cached_data[0], cached_data[1], 0.0  # (embedding, analysis, hash)
+
+                    logger.debug(f"📥 Processing image (cache miss): {url[:60]}...")
+                    img_bytes = fetch_image_bytes(url, timeout=8)
+
+                    # Generate embedding + vision analysis (with raw LLM response) concurrently
+                    img_vec, analysis_result = embed_and_analyze_image(img_bytes, image_url=url)
+
+                    # Cache atomically in new unified cache (never the fallback analysis)
+                    if not analysis_result.get("fallback"):
+                        cache_image_data(
+                            dynamodb,
+                            image_url=url,
+                            image_bytes=img_bytes,
+                            embedding=img_vec,
+                            analysis=analysis_result["analysis"],
+                            llm_response=analysis_result["llm_response"],
+                            embedding_model=IMAGE_MODEL_ID,
+                            analysis_model=LLM_MODEL_ID
+                        )
+                    return img_vec, analysis_result["analysis"], 0.0008 + 0.00025
+
+                # Every image is network-bound end to end (DynamoDB, GET, Bedrock), so run
+                # them all at once; results are merged below in the original image order
+                futures = [(url, _IMAGE_POOL.submit(_load_image, url)) for url in urls_to_process]
+
+                for url, future in futures:
                     try:
-                        # Import cache utilities
-                        from cache_utils import get_cached_image_data, cache_image_data
-                        import requests
-
-                        img_vec = None
-                        analysis = None
-                        img_bytes = None
-
-                        # Try to get from unified cache first
-                        cached_data = get_cached_image_data(dynamodb, url)
-                        if cached_data:
-                            img_vec, analysis = cached_data
-                            logger.debug(f"💾 Cache hit for image: {url[:60]}...")
-                        else:
-                            # Cache miss - download and process
-                            logger.debug(f"📥 Downloading image (cache miss): {url[:60]}...")
-                            resp = requests.get(url, timeout=8)
-                            resp.raise_for_status()
-                            img_bytes = resp.content
-
-                            # Generate embedding
-                            img_vec = embed_image_bytes(img_bytes)
-                            processing_cost += 0.0008
-
-                            # Run vision analysis with raw LLM response
-                            analysis_result = detect_labels_with_response(img_bytes, image_url=url)
-                            analysis = analysis_result["analysis"]
-                            llm_response = analysis_result["llm_response"]
-                            processing_cost += 0.00025
-
-                            # Cache atomically in new unified cache
-                            cache_image_data(
-                                dynamodb,
-                                image_url=url,
-                                image_bytes=img_bytes,
-                                embedding=img_vec,
-                                analysis=analysis,
-                                llm_response=llm_response,
-                                embedding_model=IMAGE_MODEL_ID,
-                                analysis_model=LLM_MODEL_ID
-                            )
+                        img_vec, analysis, cost = future.result()
+                        processing_cost += cost
 
                         # Process analysis results
                         if img_vec:
@@ -353,7 +379,7 @@ def add_listing_handler(event, context):
                             image_vector_metadata.append({
                                 "image_url": url,
                                 "image_type": analysis.get("image_type", "unknown"),
-                                "vector": img_vec
+                                "vector": index_vector(img_vec)
                             })
 
                     except Exception as e:
@@ -370,8 +396,8 @@ def add_listing_handler(event, context):
                 else:
                     # Legacy schema: average image vectors
                     if image_vecs and vec_text:
-                        vec_image = vec_mean(image_vecs, target_dim=len(vec_text))
-                        doc["vector_image"] = vec_image
+                        vec_image = combine_image_embeddings(image_vecs, target_dim=len(vec_text))
+                        doc["vector_image"] = index_vector(vec_image)
 
                 # Add image tags
                 if img_tags:
@@ -381,7 +407,11 @@ def add_listing_handler(event, context):
                 logger.warning(f"Image processing failed: {e}")
 
         # Index to OpenSearch
-        os_client.index(index=target_index, id=str(zpid), body=doc)
+        # Atomic create: 409s instead of overwriting a listing added concurrently
+        try:
+            os_client.index(index=target_index, id=str(zpid), body=doc, op_type="create")
+        except ConflictError:
+            return _already_exists(zpid)
 
         logger.info(f"Successfully added listing zpid={zpid}, cost=${processing_cost:.4f}")
 
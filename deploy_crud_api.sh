@@ -28,7 +28,7 @@ cp cache_utils.py "$BUILD_DIR/" 2>/dev/null || echo "  (cache_utils.py not found
 
 # Install dependencies in build directory
 cd "$BUILD_DIR"
-pip install -q -t . boto3 opensearch-py requests-aws4auth pytz numpy requests 2>&1 | grep -v "Requirement already satisfied" || true
+pip install -q -t . boto3 opensearch-py requests-aws4auth pytz numpy orjson requests 2>&1 | grep -v "Requirement already satisfied" || true
 
 # Create zip package
 zip -qr /tmp/crud_listings.zip .
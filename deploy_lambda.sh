@@ -47,6 +47,7 @@ build_package() {
         requests-aws4auth \
         pytz \
         numpy \
+        orjson \
         --quiet
 
     # Copy source files
@@ -8,9 +8,11 @@ This script reads the correct livingArea from the source JSON files and updates
 
 import json
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, List
+from urllib3.util.retry import Retry
 
 # Unbuffer output for real-time logging
 sys.stdout.reconfigure(line_buffering=True)
@@ -19,6 +21,18 @@ sys.stderr.reconfigure(line_buffering=True)
 # CRUD API endpoint
 CRUD_API = "https://mwf1h5nbxe.execute-api.us-east-1.amazonaws.com/prod"
 INDEX = "listings-v2"
+MAX_WORKERS = 16  # Concurrent PATCH requests
+
+# Keep-alive session shared by all workers; retries throttled/5xx responses with
+# backoff instead of a fixed sleep between requests. These PATCHes only set
+# values, so retrying them is safe.
+session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=MAX_WORKERS * 2,
+    pool_maxsize=MAX_WORKERS * 2,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["PATCH"]),
+))
 
 def load_zillow_data(filepath: str) -> Dict[str, dict]:
     """Load Zillow JSON and create zpid -> property mapping."""
@@ -56,7 +70,7 @@ def update_property(zpid: str, living_area: float, lot_size: float) -> bool:
     }
 
     try:
-        response = requests.patch(url, json=payload, timeout=30)
+        response = session.patch(url, json=payload, timeout=30)
         if response.status_code == 200:
             return True
         else:
@@ -84,35 +98,29 @@ def main():
     print(f"CRUD API: {CRUD_API}")
     print()
 
+    # Skip properties with no living area data
+    todo = [(zpid, data['livingArea'], data['lotSize'])
+            for zpid, data in zillow_data.items() if data['livingArea'] is not None]
+    skipped = len(zillow_data) - len(todo)
+
     updated = 0
     failed = 0
-    skipped = 0
-
-    for i, (zpid, data) in enumerate(zillow_data.items(), 1):
-        living_area = data['livingArea']
-        lot_size = data['lotSize']
-
-        # Skip if no living area data
-        if living_area is None:
-            skipped += 1
-            continue
-
-        # Update property
-        if update_property(zpid, living_area, lot_size):
-            updated += 1
-            if updated % 10 == 0:
-                print(f"✓ Updated {updated:,} properties ({failed} failed, {skipped} skipped)")
-        else:
-            failed += 1
-
-        # Rate limiting - be gentle on API
-        if i % batch_size == 0:
-            print(f"\n📊 Progress: {i:,}/{len(zillow_data):,} processed")
-            print(f"   ✓ {updated:,} updated | ❌ {failed} failed | ⊘ {skipped} skipped")
-            print(f"   Pausing 2 seconds...\n")
-            time.sleep(2)
-        else:
-            time.sleep(0.1)  # 100ms between requests
+
+    # Bounded pool: at most MAX_WORKERS requests in flight (the pacing the old
+    # sleeps provided); counters are only touched here on the main thread
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        results = ex.map(lambda item: update_property(*item), todo)
+        for i, ok in enumerate(results, 1):
+            if ok:
+                updated += 1
+                if updated % 10 == 0:
+                    print(f"✓ Updated {updated:,} properties ({failed} failed, {skipped} skipped)")
+            else:
+                failed += 1
+
+            if i % batch_size == 0:
+                print(f"\n📊 Progress: {i:,}/{len(todo):,} processed")
+                print(f"   ✓ {updated:,} updated | ❌ {failed} failed | ⊘ {skipped} skipped\n")
 
     print("\n" + "="*60)
     print("FINAL RESULTS:")
@@ -19,6 +19,9 @@ Usage:
     # Resume from specific scroll_id
     python3 reembed_listings.py --index listings-v2 --scroll-id <id>
 
+    # Whole index through one Bedrock batch inference job (needs BEDROCK_BATCH_ROLE_ARN)
+    python3 reembed_listings.py --index listings-v2 --batch-size 5000 --batch-bucket demo-hearth-data
+
 What this does:
 1. Scrolls through all documents in the index
 2. For each document with a description:
@@ -27,18 +30,23 @@ What this does:
 3. Shows progress and estimated time remaining
 4. Handles errors gracefully (logs failures, continues processing)
 
+With --batch-bucket the scroll is read to the end first (a batch job can run
+for hours, far past the scroll keep-alive), all texts go to a single Bedrock
+batch job, and the vectors are written once it finishes.
+
 Cost estimate:
 - ~1000 listings = ~$0.10 (Bedrock embedding cost)
 - Uses DynamoDB caching to avoid re-embedding identical descriptions
 """
 
 import argparse
+import contextlib
 import json
 import logging
 import os
 import sys
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # Set environment variables before importing common
 os.environ.setdefault('OS_HOST', 'search-hearth-opensearch-llfelt5zzkf2d7eead2ck6jm5a.us-east-1.es.amazonaws.com')
@@ -47,7 +55,7 @@ os.environ.setdefault('OS_INDEX', 'listings-v2')
 # Add parent directory to path for imports
 sys.path.insert(0, '/Users/andrewcarras/hearth_backend_new')
 
-from common import os_client, embed_text_multimodal
+from common import os_client, embed_texts, embed_texts_batch_job, index_vector, ingest_mode
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -96,7 +104,7 @@ def scroll_listings(index: str, batch_size: int = 100, scroll_id: Optional[str]
                     ]
                 }
             },
-            "_source": ["zpid", "description", "visual_features_text", "vector_text"]
+            "_source": ["zpid", "description", "visual_features_text"]
         }
 
         try:
@@ -133,17 +141,17 @@ def scroll_listings(index: str, batch_size: int = 100, scroll_id: Optional[str]
             logger.warning(f"Error clearing scroll: {e}")
 
 
-def reembed_batch(index: str, documents: List[Dict], dry_run: bool = False) -> Dict[str, int]:
+def texts_for_embedding(documents: List[Dict], stats: Dict[str, int]) -> List[Tuple[str, str]]:
     """
-    Re-embed a batch of documents.
+    Build the embedding input for each document (same text as indexing).
+
+    Documents without a description are counted in stats['skipped'].
 
     Returns:
-        Dict with counts: {updated, skipped, errors}
+        List of (zpid, combined text)
     """
-    stats = {"updated": 0, "skipped": 0, "errors": 0}
-
+    pending = []
     for doc in documents:
-        zpid = doc['_id']
         source = doc.get('_source', {})
         description = source.get('description', '')
         visual_features_text = source.get('visual_features_text', '')
@@ -152,16 +160,28 @@ def reembed_batch(index: str, documents: List[Dict], dry_run: bool = False) -> D
             stats['skipped'] += 1
             continue
 
-        try:
-            # Combine description + visual_features_text (same as indexing)
-            text_for_embed = description.strip()
-            if visual_features_text:
-                combined_text = f"{text_for_embed} {visual_features_text}".strip()
-            else:
-                combined_text = text_for_embed
+        # Combine description + visual_features_text (same as indexing)
+        text_for_embed = description.strip()
+        if visual_features_text:
+            combined_text = f"{text_for_embed} {visual_features_text}".strip()
+        else:
+            combined_text = text_for_embed
+        pending.append((doc['_id'], combined_text))
+    return pending
 
-            # Generate new multimodal embedding
-            new_vector = embed_text_multimodal(combined_text)
+
+def apply_vectors(index: str, pending: List[Tuple[str, str]], vectors: List, stats: Dict[str, int],
+                  dry_run: bool = False):
+    """
+    Write new vector_text values (vectors[i] belongs to pending[i]).
+
+    Failed embeddings come back as exceptions in place of vectors and are
+    counted in stats['errors'] along with failed updates.
+    """
+    for (zpid, combined_text), new_vector in zip(pending, vectors):
+        try:
+            if isinstance(new_vector, Exception):
+                raise new_vector
 
             if not new_vector or len(new_vector) == 0:
                 logger.warning(f"Empty vector for zpid={zpid}")
@@ -178,7 +198,7 @@ def reembed_batch(index: str, documents: List[Dict], dry_run: bool = False) -> D
                     id=zpid,
                     body={
                         "doc": {
-                            "vector_text": new_vector,
+                            "vector_text": index_vector(new_vector),
                             "updated_at": int(time.time())
                         }
                     }
@@ -190,9 +210,57 @@ def reembed_batch(index: str, documents: List[Dict], dry_run: bool = False) -> D
             logger.error(f"Error processing zpid={zpid}: {e}")
             stats['errors'] += 1
 
+
+def reembed_batch(index: str, documents: List[Dict], dry_run: bool = False) -> Dict[str, int]:
+    """
+    Re-embed a batch of documents with concurrent real-time Bedrock calls.
+
+    Returns:
+        Dict with counts: {updated, skipped, errors}
+    """
+    stats = {"updated": 0, "skipped": 0, "errors": 0}
+
+    # Build the texts first so the whole batch can be embedded concurrently
+    pending = texts_for_embedding(documents, stats)
+    vectors = embed_texts([text for _, text in pending], multimodal=True, return_exceptions=True)
+    apply_vectors(index, pending, vectors, stats, dry_run)
     return stats
 
 
+def reembed_with_batch_job(index: str, batch_size: int, batch_bucket: str, max_listings: Optional[int] = None,
+                           dry_run: bool = False, ingest=None, scroll_id: Optional[str] = None) -> Tuple[int, Dict[str, int]]:
+    """
+    Re-embed through a single Bedrock batch inference job.
+
+    The scroll is drained before the job is submitted: the job polls for
+    minutes to hours, which would expire the scroll context if it ran between
+    pages. Index settings (ingest) are only relaxed for the write phase.
+
+    Returns:
+        (documents read, {updated, skipped, errors})
+    """
+    stats = {"updated": 0, "skipped": 0, "errors": 0}
+    pending: List[Tuple[str, str]] = []
+    processed = 0
+    for _, hits in scroll_listings(index, batch_size, scroll_id):
+        if max_listings:
+            hits = hits[:max_listings - processed]
+        processed += len(hits)
+        pending.extend(texts_for_embedding(hits, stats))
+        logger.info(f"Collected {processed:,} documents")
+        if max_listings and processed >= max_listings:
+            break
+
+    logger.info(f"Submitting one Bedrock batch job for {len(pending):,} texts")
+    vectors = embed_texts_batch_job([text for _, text in pending], batch_bucket,
+                                    f"bedrock-batch/reembed-{int(time.time())}",
+                                    multimodal=True, return_exceptions=True)
+
+    with ingest or contextlib.nullcontext():
+        apply_vectors(index, pending, vectors, stats, dry_run)
+    return processed, stats
+
+
 def main():
     parser = argparse.ArgumentParser(description='Bulk re-embed listings with multimodal embeddings')
     parser.add_argument('--index', default='listings-v2', help='OpenSearch index name')
@@ -200,6 +268,7 @@ def main():
     parser.add_argument('--max-listings', type=int, help='Maximum number of listings to process (for testing)')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be updated without making changes')
     parser.add_argument('--scroll-id', help='Resume from existing scroll_id')
+    parser.add_argument('--batch-bucket', help='S3 bucket for one Bedrock batch inference job over all listings')
 
     args = parser.parse_args()
 
@@ -238,35 +307,44 @@ def main():
     logger.info("Starting re-embedding process...")
     logger.info("=" * 80 + "\n")
 
-    try:
-        for scroll_id, hits in scroll_listings(args.index, args.batch_size, args.scroll_id):
-            batch_stats = reembed_batch(args.index, hits, args.dry_run)
-
-            # Update totals
-            for key in total_stats:
-                total_stats[key] += batch_stats[key]
-
-            processed += len(hits)
-
-            # Progress update
-            elapsed = time.time() - start_time
-            rate = processed / elapsed if elapsed > 0 else 0
-            eta = (total_count - processed) / rate if rate > 0 else 0
-
-            logger.info(
-                f"Progress: {processed:,}/{total_count:,} ({processed/total_count*100:.1f}%) | "
-                f"Updated: {total_stats['updated']:,} | "
-                f"Skipped: {total_stats['skipped']:,} | "
-                f"Errors: {total_stats['errors']:,} | "
-                f"Rate: {rate:.1f} docs/sec | "
-                f"ETA: {eta/60:.1f} min"
-            )
+    # Vector updates rewrite whole documents; skip refresh/replica work until the end
+    ingest = ingest_mode(args.index) if not args.dry_run else contextlib.nullcontext()
 
-            # Check if we've hit the max
-            if args.max_listings and processed >= args.max_listings:
-                logger.info(f"\n✓ Reached max listings limit ({args.max_listings:,})")
-                logger.info(f"Resume with: --scroll-id {scroll_id}")
-                break
+    scroll_id = args.scroll_id
+    try:
+        if args.batch_bucket:
+            processed, total_stats = reembed_with_batch_job(args.index, args.batch_size, args.batch_bucket,
+                                                            args.max_listings, args.dry_run, ingest, args.scroll_id)
+        else:
+            with ingest:
+                for scroll_id, hits in scroll_listings(args.index, args.batch_size, args.scroll_id):
+                    batch_stats = reembed_batch(args.index, hits, args.dry_run)
+
+                    # Update totals
+                    for key in total_stats:
+                        total_stats[key] += batch_stats[key]
+
+                    processed += len(hits)
+
+                    # Progress update
+                    elapsed = time.time() - start_time
+                    rate = processed / elapsed if elapsed > 0 else 0
+                    eta = (total_count - processed) / rate if rate > 0 else 0
+
+                    logger.info(
+                        f"Progress: {processed:,}/{total_count:,} ({processed/total_count*100:.1f}%) | "
+                        f"Updated: {total_stats['updated']:,} | "
+                        f"Skipped: {total_stats['skipped']:,} | "
+                        f"Errors: {total_stats['errors']:,} | "
+                        f"Rate: {rate:.1f} docs/sec | "
+                        f"ETA: {eta/60:.1f} min"
+                    )
+
+                    # Check if we've hit the max
+                    if args.max_listings and processed >= args.max_listings:
+                        logger.info(f"\n✓ Reached max listings limit ({args.max_listings:,})")
+                        logger.info(f"Resume with: --scroll-id {scroll_id}")
+                        break
 
     except KeyboardInterrupt:
         logger.info("\n\n⚠️  Interrupted by user")
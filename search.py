@@ -41,15 +41,17 @@ import json
 import logging
 import os
 import base64
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 import boto3
-import math
+import numpy as np
 
 from common import (
     os_client, OS_INDEX, embed_text_multimodal, embed_image_bytes,
-    extract_query_constraints, AWS_REGION
+    embed_texts, extract_query_constraints, knn_clause, AWS_REGION, http_session
 )
 from search_logger import generate_query_id, log_search_query
 
@@ -68,6 +70,13 @@ S3_CACHE_TTL = 3600  # 1 hour in seconds
 # Google Places API configuration (set via Lambda environment variable)
 GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
 
+# Small pool for overlapping independent Bedrock calls within one search request
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
+# In-process TTL cache in front of the DynamoDB geolocation cache (warm containers)
+NEARBY_MEMO_TTL = int(os.getenv("NEARBY_MEMO_TTL", "86400"))  # 1 day in seconds
+NEARBY_MEMO_SIZE = int(os.getenv("NEARBY_MEMO_SIZE", "4096"))
+
 # Feature terms that should be treated as required when mentioned in query
 # These are concrete property features, not stylistic attributes
 REQUIRED_FEATURE_TERMS = {
@@ -104,22 +113,47 @@ def _get_location_key(lat: float, lon: float, radius_meters: int = 1000) -> str:
     return f"{lat_rounded},{lon_rounded},{radius_meters}"
 
 
+# location_key -> (expires_at, places); insertion-ordered so the oldest entry is evicted first
+_NEARBY_MEMO: Dict[str, Any] = {}
+_NEARBY_MEMO_LOCK = threading.Lock()
+
+
+def _memo_nearby_places(location_key: str, places: List[Dict[str, Any]]):
+    """Remember nearby places in-process for NEARBY_MEMO_TTL seconds."""
+    if NEARBY_MEMO_SIZE <= 0:
+        return
+    with _NEARBY_MEMO_LOCK:
+        _NEARBY_MEMO.pop(location_key, None)
+        while len(_NEARBY_MEMO) >= NEARBY_MEMO_SIZE:
+            _NEARBY_MEMO.pop(next(iter(_NEARBY_MEMO)))
+        _NEARBY_MEMO[location_key] = (time.time() + NEARBY_MEMO_TTL, places)
+
+
 def _get_cached_nearby_places(location_key: str) -> List[Dict[str, Any]]:
-    """Check DynamoDB cache for nearby places."""
+    """Check the in-process memo, then the DynamoDB cache, for nearby places."""
+    entry = _NEARBY_MEMO.get(location_key)
+    if entry is not None:
+        if entry[0] > time.time():
+            return entry[1]
+        _NEARBY_MEMO.pop(location_key, None)
+
     try:
         response = dynamodb.get_item(
             TableName=GEOLOCATION_CACHE_TABLE,
             Key={"location_key": {"S": location_key}}
         )
         if "Item" in response and "places" in response["Item"]:
-            return json.loads(response["Item"]["places"]["S"])
+            places = json.loads(response["Item"]["places"]["S"])
+            _memo_nearby_places(location_key, places)
+            return places
     except Exception as e:
         logger.warning(f"Geolocation cache read failed: {e}")
     return None
 
 
 def _cache_nearby_places(location_key: str, places: List[Dict[str, Any]]):
-    """Store nearby places in DynamoDB cache."""
+    """Store nearby places in the in-process memo and the DynamoDB cache."""
+    _memo_nearby_places(location_key, places)
     try:
         dynamodb.put_item(
             TableName=GEOLOCATION_CACHE_TABLE,
@@ -136,7 +170,7 @@ def _cache_nearby_places(location_key: str, places: List[Dict[str, Any]]):
 def enrich_with_nearby_places(listing: Dict[str, Any]) -> Dict[str, Any]:
     """
     Enrich a single listing with nearby places from Google Places API.
-    Uses DynamoDB cache to avoid duplicate API calls.
+    Uses an in-process TTL memo and the DynamoDB cache to avoid duplicate API calls.
 
     Cost: ~$0.017 per cache miss (first time seeing this location)
           $0 per cache hit (subsequent lookups)
@@ -164,8 +198,6 @@ def enrich_with_nearby_places(listing: Dict[str, Any]) -> Dict[str, Any]:
 
     # Cache miss - call Google Places API (New)
     try:
-        import requests
-
         url = "https://places.googleapis.com/v1/places:searchNearby"
         headers = {
             "Content-Type": "application/json",
@@ -185,7 +217,7 @@ def enrich_with_nearby_places(listing: Dict[str, Any]) -> Dict[str, Any]:
             "maxResultCount": 10
         }
 
-        response = requests.post(url, json=payload, headers=headers, timeout=5)
+        response = http_session.post(url, json=payload, headers=headers, timeout=5)  # Keep-alive session
         response.raise_for_status()
         data = response.json()
 
@@ -304,7 +336,7 @@ def _fetch_listing_from_s3(zpid: str) -> Dict[str, Any]:
             Bucket="demo-hearth-data",
             Key=f"listings/{zpid}.json"
         )
-        data = json.loads(response["Body"].read().decode("utf-8"))
+        data = json.loads(response["Body"].read())  # json.loads accepts UTF-8 bytes directly
 
         # Cache for next time
         _cache_s3_listing(zpid, data)
@@ -692,7 +724,7 @@ def split_query_into_subqueries(query_text: str, must_have_features: List[str])
             "combination_strategy": "weighted_sum"
         }
     """
-    from common import brt, LLM_MODEL_ID
+    from common import invoke_llm_with_cache
 
     prompt = f"""You are helping optimize visual search for real estate properties. Given a user's query,
 split it into separate sub-queries that can be individually embedded and compared to property images.
@@ -746,16 +778,12 @@ Return strict JSON:
 }}"""
 
     try:
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 1024,
-            "temperature": 0,  # Deterministic
-            "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
-        }
-
-        resp = brt.invoke_model(modelId=LLM_MODEL_ID, body=json.dumps(body))
-        raw = resp["body"].read().decode("utf-8")
-        parsed = json.loads(raw)
+        parsed = invoke_llm_with_cache(
+            None,
+            [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+            max_tokens=1024,
+            temperature=0,  # Deterministic
+        )
         text = parsed["content"][0]["text"]
 
         # Handle LLM responses that include extra text before/after JSON
@@ -838,7 +866,7 @@ def enhance_query_for_architecture(
     Returns:
         Enhanced query string optimized for hybrid search
     """
-    from common import brt, LLM_MODEL_ID
+    from common import invoke_llm_with_cache
 
     # Build style context
     style_info = f"{architecture_style} (maps to: {', '.join(mapped_styles)})" if mapped_styles else architecture_style
@@ -880,16 +908,12 @@ EXAMPLES:
 Enhanced query:"""
 
     try:
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 128,
-            "temperature": 0,  # Deterministic
-            "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
-        }
-
-        resp = brt.invoke_model(modelId=LLM_MODEL_ID, body=json.dumps(body))
-        raw = resp["body"].read().decode("utf-8")
-        parsed = json.loads(raw)
+        parsed = invoke_llm_with_cache(
+            None,
+            [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+            max_tokens=128,
+            temperature=0,  # Deterministic
+        )
         enhanced = parsed["content"][0]["text"].strip()
 
         # Remove quotes if LLM added them
@@ -903,6 +927,27 @@ Enhanced query:"""
         return original_query
 
 
+def _cosine_matrix(query_vecs: List[List[float]], image_vecs: List[List[float]]) -> np.ndarray:
+    """
+    Cosine similarity of every query vector against every image vector in one matrix product.
+
+    Args:
+        query_vecs: Query embeddings (all the same dimension as the image vectors)
+        image_vecs: Stored image vectors (float or int8; cosine is scale-invariant)
+
+    Returns:
+        Array of shape (len(query_vecs), len(image_vecs)); pairs where either
+        vector has zero magnitude are NaN
+    """
+    if not query_vecs or not image_vecs:
+        return np.empty((len(query_vecs), len(image_vecs)))
+    q = np.asarray(query_vecs, dtype=np.float64)
+    m = np.asarray(image_vecs, dtype=np.float64)
+    norms = np.outer(np.linalg.norm(q, axis=1), np.linalg.norm(m, axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(norms > 0, (q @ m.T) / norms, np.nan)
+
+
 def calculate_multi_query_image_score(inner_hits: Dict, sub_query_embeddings: List[Dict]) -> float:
     """
     Score property images using multiple sub-query embeddings with greedy diversification.
@@ -940,27 +985,20 @@ def calculate_multi_query_image_score(inner_hits: Dict, sub_query_embeddings: Li
         return 0.0
 
     # Calculate all (sub-query, image) pair similarities
+    sims = _cosine_matrix([sq["embedding"] for sq in sub_query_embeddings],
+                          [img["vector"] for img in image_vectors])
     all_matches = []
     for sq_idx, sq_embed in enumerate(sub_query_embeddings):
-        query_vec = sq_embed["embedding"]
         weight = sq_embed["weight"]
         feature = sq_embed.get("feature", "unknown")
 
-        for img_obj in image_vectors:
-            img_vec = img_obj["vector"]
-            img_idx = img_obj["index"]
-
-            # Cosine similarity
-            dot_product = sum(a * b for a, b in zip(query_vec, img_vec))
-            mag_q = math.sqrt(sum(a * a for a in query_vec))
-            mag_i = math.sqrt(sum(b * b for b in img_vec))
-
-            if mag_q > 0 and mag_i > 0:
-                similarity = dot_product / (mag_q * mag_i)
+        for img_pos, img_obj in enumerate(image_vectors):
+            similarity = sims[sq_idx, img_pos]
+            if not np.isnan(similarity):
                 all_matches.append({
                     "sub_query_index": sq_idx,
-                    "image_index": img_idx,
-                    "score": similarity,
+                    "image_index": img_obj["index"],
+                    "score": float(similarity),
                     "weight": weight,
                     "feature": feature
                 })
@@ -1046,24 +1084,20 @@ def calculate_multi_query_image_score_detailed(inner_hits: Dict, sub_query_embed
     # GREEDY SELECTION FOR DIVERSIFICATION
     # Calculate ALL (sub-query, image) pair similarities
     all_matches = []  # List of {sq_idx, feature, weight, img_idx, score, url}
+    sims = _cosine_matrix([sq["embedding"] for sq in sub_query_embeddings],
+                          [img["vector"] for img in image_vectors])
 
     for sq_idx, sq_embed in enumerate(sub_query_embeddings):
-        query_vec = sq_embed["embedding"]
         weight = sq_embed["weight"]
         feature = sq_embed.get("feature", "unknown")
         query_text = sq_embed.get("query", "")
 
-        for img_data in image_vectors:
-            img_vec = img_data["vector"]
+        for img_pos, img_data in enumerate(image_vectors):
             img_index = img_data["index"]
+            similarity = sims[sq_idx, img_pos]
 
-            # Cosine similarity
-            dot_product = sum(a * b for a, b in zip(query_vec, img_vec))
-            mag_q = math.sqrt(sum(a * a for a in query_vec))
-            mag_i = math.sqrt(sum(b * b for b in img_vec))
-
-            if mag_q > 0 and mag_i > 0:
-                similarity = dot_product / (mag_q * mag_i)
+            if not np.isnan(similarity):
+                similarity = float(similarity)
                 url = image_urls[img_index] if img_index < len(image_urls) else ""
 
                 all_matches.append({
@@ -1436,6 +1470,11 @@ def handler(event, context):
     errors = []
     warnings = []
 
+    # Embed the raw query on a worker while Claude parses constraints; the two
+    # Bedrock calls are independent unless the query gets rewritten below (short
+    # architecture queries only), in which case this embed is discarded
+    q_vec_future = _SEARCH_POOL.submit(embed_text_multimodal, q)
+
     # Constraint extraction timing
     t0 = time.time()
     constraints = extract_query_constraints(q)
@@ -1527,9 +1566,13 @@ def handler(event, context):
 
     # CRITICAL FIX: Use multimodal embedding to match image embedding space
     t0 = time.time()
-    q_vec = embed_text_multimodal(query_for_embedding)
+    if query_for_embedding == q:
+        q_vec = q_vec_future.result()  # Usually already done (overlapped with constraint extraction)
+        timing_data["bedrock_embedding_calls"] = 1
+    else:
+        q_vec = embed_text_multimodal(query_for_embedding)
+        timing_data["bedrock_embedding_calls"] = 2  # Speculative raw-query embed + rewritten query
     timing_data["embedding_generation_ms"] = (time.time() - t0) * 1000
-    timing_data["bedrock_embedding_calls"] = 1
     filter_clauses = _filters_to_bool(hard_filters, require_embeddings=require_embeddings)["bool"]["filter"]
 
     # Add required feature filters (pool, garage, etc. must be present)
@@ -1641,10 +1684,7 @@ def handler(event, context):
                     "must": [
                         {
                             "knn": {
-                                "vector_text": {
-                                    "vector": q_vec,
-                                    "k": topK
-                                }
+                                "vector_text": knn_clause(q_vec, topK)
                             }
                         }
                     ],
@@ -1706,8 +1746,9 @@ def handler(event, context):
             # Generate embeddings for each sub-query
             t0 = time.time()
             sub_query_embeddings = []
-            for sq in sub_query_result.get("sub_queries", []):
-                sq_embedding = embed_text_multimodal(sq["query"])
+            sub_queries = sub_query_result.get("sub_queries", [])
+            sq_vectors = embed_texts([sq["query"] for sq in sub_queries], multimodal=True)
+            for sq, sq_embedding in zip(sub_queries, sq_vectors):
                 sub_query_embeddings.append({
                     "embedding": sq_embedding,
                     "weight": sq["weight"],
@@ -1761,10 +1802,7 @@ def handler(event, context):
                                         "score_mode": "sum",  # Sum all images (we'll apply top-k later)
                                         "query": {
                                             "knn": {
-                                                "image_vectors.vector": {
-                                                    "vector": q_vec,
-                                                    "k": topK
-                                                }
+                                                "image_vectors.vector": knn_clause(q_vec, topK)
                                             }
                                         },
                                         "inner_hits": {
@@ -1788,10 +1826,7 @@ def handler(event, context):
                             "must": [
                                 {
                                     "knn": {
-                                        "vector_image": {
-                                            "vector": q_vec,
-                                            "k": topK
-                                        }
+                                        "vector_image": knn_clause(q_vec, topK)
                                     }
                                 }
                             ],
@@ -1945,11 +1980,8 @@ def handler(event, context):
             first_img_vec = first_img_vec_obj.get("vector")
 
             if first_img_vec and q_vec and len(first_img_vec) == len(q_vec):
-                # Calculate cosine similarity for first image
-                dot_product = sum(q * i for q, i in zip(q_vec, first_img_vec))
-                q_magnitude = math.sqrt(sum(q * q for q in q_vec)) + 1e-10
-                i_magnitude = math.sqrt(sum(i * i for i in first_img_vec)) + 1e-10
-                cosine_sim = dot_product / (q_magnitude * i_magnitude)
+                # Calculate cosine similarity for first image (zero vectors count as 0)
+                cosine_sim = np.nan_to_num(_cosine_matrix([q_vec], [first_img_vec])[0, 0])
                 first_image_score = (1.0 + float(cosine_sim)) / 2.0
 
                 # Apply boost if first image scores highly (>0.73 = top quartile)
@@ -2057,33 +2089,23 @@ def handler(event, context):
                     # q_vec is the text embedding of the search query
                     query_vec = q_vec
 
-                    image_scores = []
-                    for idx, img_vec_obj in enumerate(src["image_vectors"]):
-                        # Each image_vectors element has: image_url, vector, etc.
-                        img_vec = img_vec_obj.get("vector")
-                        img_url = img_vec_obj.get("image_url")  # Field is "image_url" not "url"
-
-                        if img_vec and len(img_vec) == len(query_vec):
-                            # Compute cosine similarity manually (pure Python, no numpy)
-                            # OpenSearch kNN score formula: score = (1 + cosine_similarity) / 2
-
-                            # Calculate dot product
-                            dot_product = sum(q * i for q, i in zip(query_vec, img_vec))
-
-                            # Calculate magnitudes
-                            q_magnitude = math.sqrt(sum(q * q for q in query_vec)) + 1e-10
-                            i_magnitude = math.sqrt(sum(i * i for i in img_vec)) + 1e-10
-
-                            # Cosine similarity
-                            cosine_sim = dot_product / (q_magnitude * i_magnitude)
-
-                            # Apply OpenSearch kNN score transformation
-                            score = (1.0 + float(cosine_sim)) / 2.0
+                    # Each image_vectors element has: image_url, vector, etc.
+                    scored = [
+                        (idx, img_vec_obj.get("image_url"), img_vec_obj["vector"])  # Field is "image_url" not "url"
+                        for idx, img_vec_obj in enumerate(src["image_vectors"])
+                        if img_vec_obj.get("vector") and len(img_vec_obj["vector"]) == len(query_vec)
+                    ]
 
+                    image_scores = []
+                    if scored:
+                        # Cosine similarity for all images at once (zero vectors count as 0)
+                        cosine_sims = np.nan_to_num(_cosine_matrix([query_vec], [vec for _, _, vec in scored])[0])
+                        for (idx, img_url, _), cosine_sim in zip(scored, cosine_sims):
+                            # Apply OpenSearch kNN score transformation: (1 + cosine_similarity) / 2
                             image_scores.append({
                                 "index": idx,
                                 "url": img_url,
-                                "score": score
+                                "score": (1.0 + float(cosine_sim)) / 2.0
                             })
 
                     # Sort by score descending to show best matches first
@@ -2264,7 +2286,11 @@ def get_listing_handler(event, context):
 
     try:
         # Fetch from OpenSearch
-        response = os_client.get(index=target_index, id=str(zpid))
+        # Vectors are stripped from the response below; don't ship them over the wire
+        response = os_client.get(
+            index=target_index, id=str(zpid),
+            _source_excludes=["vector_text", "vector_image", "image_vectors"]
+        )
 
         if not response.get("found"):
             return {
@@ -39,7 +39,7 @@ import math
 
 from common import (
     os_client, OS_INDEX, embed_text_multimodal,
-    extract_query_constraints, AWS_REGION
+    extract_query_constraints, knn_clause, AWS_REGION
 )
 
 logger = logging.getLogger(__name__)
@@ -945,10 +945,7 @@ def handler(event, context):
                     "must": [
                         {
                             "knn": {
-                                "vector_text": {
-                                    "vector": q_vec,
-                                    "k": topK
-                                }
+                                "vector_text": knn_clause(q_vec, topK)
                             }
                         }
                     ],
@@ -1005,10 +1002,7 @@ def handler(event, context):
                                         "score_mode": "sum",  # Sum all images (we'll apply top-k later)
                                         "query": {
                                             "knn": {
-                                                "image_vectors.vector": {
-                                                    "vector": q_vec,
-                                                    "k": topK
-                                                }
+                                                "image_vectors.vector": knn_clause(q_vec, topK)
                                             }
                                         },
                                         "inner_hits": {
@@ -1032,10 +1026,7 @@ def handler(event, context):
                             "must": [
                                 {
                                     "knn": {
-                                        "vector_image": {
-                                            "vector": q_vec,
-                                            "k": topK
-                                        }
+                                        "vector_image": knn_clause(q_vec, topK)
                                     }
                                 }
                             ],
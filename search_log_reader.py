@@ -68,9 +68,11 @@ def get_search_by_query_id(query_id: str) -> Optional[Dict]:
         Dictionary with search log data, or None if not found
     """
     try:
-        response = dynamodb.scan(
+        # query_id is the partition key. (A filtered Scan with Limit=1 only
+        # examined the first item in the table, so it almost never matched.)
+        response = dynamodb.query(
             TableName=TABLE_NAME,
-            FilterExpression='query_id = :qid',
+            KeyConditionExpression='query_id = :qid',
             ExpressionAttributeValues={
                 ':qid': {'S': query_id}
             },
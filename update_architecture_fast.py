@@ -62,6 +62,10 @@ os_client = OpenSearch(
 brt = boto3.client('bedrock-runtime', region_name=REGION)
 dynamodb = boto3.client('dynamodb', region_name=REGION)
 
+# One keep-alive session for image downloads and CRUD API calls (no TLS handshake per request)
+http = requests.Session()
+http.headers.update({"User-Agent": "hearth-indexer/1.0"})
+
 
 def get_properties_paginated(start_offset=0, limit=100):
     """
@@ -76,7 +80,8 @@ def get_properties_paginated(start_offset=0, limit=100):
     # Build query with pagination
     query_body = {
         "query": {"match_all": {}},
-        "_source": ["zpid", "image_vectors", "architecture_style"],
+        # Only image type/URL are needed: leave the 1024-dim vectors on the server
+        "_source": ["zpid", "image_vectors.image_type", "image_vectors.image_url", "architecture_style"],
         "size": FETCH_SIZE,
         "sort": [{"zpid": "asc"}]  # Sort by zpid for consistent pagination
     }
@@ -150,7 +155,6 @@ def analyze_with_hierarchical_prompt(image_url):
     Returns dict with: architecture_style, architecture_style_specific, architecture_confidence
     """
     import base64
-    import urllib.request
 
     prompt = """Analyze this property photo. Return STRICT JSON format:
 {
@@ -181,8 +185,9 @@ RULES:
 
     try:
         # Download image and convert to base64
-        with urllib.request.urlopen(image_url) as response:
-            img_bytes = response.read()
+        response = http.get(image_url, timeout=15)
+        response.raise_for_status()
+        img_bytes = response.content
 
         b64_image = base64.b64encode(img_bytes).decode("utf-8")
 
@@ -240,7 +245,7 @@ def update_property_via_crud(zpid, updates, dry_run=False):
             "preserve_embeddings": True
         }
 
-        response = requests.patch(url, json=payload, timeout=10)
+        response = http.patch(url, json=payload, timeout=10)
 
         if response.status_code == 200:
             return {'success': True}
@@ -50,17 +50,18 @@ import logging
 import os
 import uuid
 import threading
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import boto3
-import requests
+import numpy as np
 
 from common import (
     AWS_REGION, OS_INDEX, MAX_IMAGES, EMBEDDING_IMAGE_WIDTH,
     IMAGE_MODEL_ID, LLM_MODEL_ID,
-    create_index_if_needed, bulk_upsert,
-    embed_text_multimodal, embed_image_bytes, detect_labels_with_response,
-    extract_zillow_images, vec_mean
+    create_index_if_needed, forget_index_ready, bulk_upsert, begin_bulk_load, finalize_index,
+    embed_text_np,
+    extract_zillow_images, combine_image_embeddings, is_nonzero_vector, index_vector, fetch_image_bytes,
+    embed_and_analyze_image
 )
 
 logger = logging.getLogger(__name__)
@@ -71,6 +72,11 @@ s3 = boto3.client("s3", region_name=AWS_REGION)
 lambda_client = boto3.client("lambda", region_name=AWS_REGION)
 dynamodb = boto3.client("dynamodb", region_name=AWS_REGION)
 
+# Documents accumulated before each bulk_upsert call. bulk_upsert splits these into
+# BULK_CHUNK_DOCS / BULK_MAX_CHUNK_BYTES requests sent over parallel streams, so a
+# larger flush gives those streams enough chunks to run concurrently.
+UPLOAD_BULK_FLUSH = int(os.getenv("UPLOAD_BULK_FLUSH", "200"))
+
 # Job tracking table for idempotency
 JOB_TRACKING_TABLE = "hearth-indexing-jobs"
 
@@ -81,37 +87,6 @@ JOB_TRACKING_TABLE = "hearth-indexing-jobs"
 BEDROCK_SEMAPHORE = threading.Semaphore(10)
 
 
-def _bedrock_with_retry(func, max_retries=5):
-    """
-    Execute a Bedrock API call with exponential backoff retry.
-
-    Args:
-        func: Lambda function that makes the Bedrock API call
-        max_retries: Maximum number of retry attempts
-
-    Returns:
-        Result from func()
-
-    Raises:
-        Exception: If all retries exhausted
-    """
-    import time
-    import random
-
-    for attempt in range(max_retries):
-        try:
-            return func()
-        except Exception as e:
-            if "ThrottlingException" in str(e) or "Too many requests" in str(e):
-                if attempt < max_retries - 1:
-                    # Exponential backoff: 1s, 2s, 4s, 8s, 16s
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    logger.debug(f"Bedrock throttled, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-            raise
-
-
 # ===============================================
 # DATA LOADING & EXTRACTION HELPERS
 # ===============================================
@@ -135,8 +110,8 @@ def _load_listings_from_s3(bucket: str, key: str) -> List[Dict[str, Any]]:
         ValueError: If JSON structure is not recognized
     """
     obj = s3.get_object(Bucket=bucket, Key=key)
-    raw = obj["Body"].read().decode("utf-8")
-    data = json.loads(raw)
+    # json.loads accepts UTF-8 bytes directly; skip the intermediate decoded str copy
+    data = json.loads(obj["Body"].read())
 
     if isinstance(data, dict) and "listings" in data:
         return data["listings"]  # Wrapped format
@@ -309,9 +284,7 @@ def _process_single_image(image_url: str, zpid: str) -> Dict[str, Any]:
 
         # Cache miss - need to download and process
         logger.debug(f"📥 Downloading image (cache miss): {image_url[:60]}...")
-        resp = requests.get(image_url, timeout=8)
-        resp.raise_for_status()
-        bb = resp.content
+        bb = fetch_image_bytes(image_url, timeout=8)
 
         # Calculate hash immediately for dedup
         img_hash = hashlib.md5(bb).hexdigest()
@@ -320,27 +293,26 @@ def _process_single_image(image_url: str, zpid: str) -> Dict[str, Any]:
         # RATE LIMITING: Acquire semaphore before Bedrock API calls
         # This prevents too many concurrent requests and throttling
         with BEDROCK_SEMAPHORE:
-            # Generate embedding with retry logic
-            img_vec = _bedrock_with_retry(lambda: embed_image_bytes(bb))
-            result["embedding"] = img_vec
-
-            # Get comprehensive analysis with retry logic
-            analysis_result = _bedrock_with_retry(lambda: detect_labels_with_response(bb, image_url=image_url))
+            # Embedding + comprehensive analysis, concurrently and with retry logic
+            img_vec, analysis_result = embed_and_analyze_image(bb, image_url=image_url)
             analysis = analysis_result["analysis"]
             llm_response = analysis_result["llm_response"]
+            result["embedding"] = img_vec
             result["analysis"] = analysis
 
-        # Cache both embedding and analysis atomically
-        cache_image_data(
-            dynamodb,
-            image_url=image_url,
-            image_bytes=bb,
-            embedding=img_vec,
-            analysis=analysis,
-            llm_response=llm_response,
-            embedding_model=IMAGE_MODEL_ID,
-            analysis_model=LLM_MODEL_ID
-        )
+        # Cache both embedding and analysis atomically (a fallback analysis would
+        # be served from cache forever, so leave it for the next run to redo)
+        if not analysis_result.get("fallback"):
+            cache_image_data(
+                dynamodb,
+                image_url=image_url,
+                image_bytes=bb,
+                embedding=img_vec,
+                analysis=analysis,
+                llm_response=llm_response,
+                embedding_model=IMAGE_MODEL_ID,
+                analysis_model=LLM_MODEL_ID
+            )
 
         result["success"] = True
 
@@ -485,7 +457,7 @@ def _build_doc(base: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
                         image_vector_metadata.append({
                             "image_url": url,
                             "image_type": analysis.get("image_type", "unknown"),
-                            "vector": img_vec
+                            "vector": index_vector(np.asarray(img_vec, dtype=np.float32))
                         })
 
                 except Exception as e:
@@ -608,8 +580,9 @@ def _build_doc(base: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
             combined_text = text_for_embed
 
         if combined_text:
-            vec_text = embed_text_multimodal(combined_text)
-            if not vec_text or len(vec_text) == 0:
+            # float32 array kept end-to-end; orjson writes it into the bulk payload
+            vec_text = embed_text_np(combined_text, multimodal=True)
+            if vec_text.size == 0:
                 raise ValueError("Empty vector returned from embed_text")
             logger.debug(f"Embedded {len(combined_text)} chars (desc: {len(text_for_embed)}, visual: {len(visual_features_text)})")
         else:
@@ -621,21 +594,23 @@ def _build_doc(base: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
 
     # If text embedding failed, use zeros
     if vec_text is None:
-        vec_text = [0.0] * int(os.getenv("TEXT_DIM", "1024"))
+        vec_text = np.zeros(int(os.getenv("TEXT_DIM", "1024")), dtype=np.float32)
 
-    vec_image = vec_mean(image_vecs, target_dim=len(vec_text)) if image_vecs else [0.0] * len(vec_text)
+    # float32 array (unit length); serialized directly into the bulk payload
+    vec_image = combine_image_embeddings(image_vecs, target_dim=len(vec_text))
 
-    # Determine if embeddings are valid (non-zero) - compute sums once for efficiency
+    # Determine if embeddings are valid (non-zero); invalid vectors are left out of
+    # the document entirely rather than serialized and inserted into the HNSW graph
     zpid = base.get("zpid")
-    text_embed_sum = sum(abs(v) for v in vec_text) if vec_text else 0.0
-    image_embed_sum = sum(abs(v) for v in vec_image) if vec_image else 0.0
+    text_embed_sum = float(np.abs(vec_text).sum())
+    image_embed_sum = float(np.abs(vec_image).sum())
 
-    has_valid_text_embedding = not text_embedding_failed and vec_text and text_embed_sum > 0.0
-    has_valid_image_embedding = len(image_vecs) > 0 and vec_image and image_embed_sum > 0.0
+    has_valid_text_embedding = not text_embedding_failed and is_nonzero_vector(vec_text)
+    has_valid_image_embedding = len(image_vecs) > 0 and is_nonzero_vector(vec_image)
     has_valid_embeddings = has_valid_text_embedding or has_valid_image_embedding
 
     # Logging: Embedding details and validation (now using pre-computed sums)
-    logger.info(f"🔍 zpid={zpid}: text_len={len(vec_text) if vec_text else 0}, "
+    logger.info(f"🔍 zpid={zpid}: text_len={len(vec_text)}, "
                 f"text_sum={text_embed_sum:.4f}, text_valid={has_valid_text_embedding}")
     logger.info(f"   image_count={len(image_vecs)}, image_sum={image_embed_sum:.4f}, "
                 f"image_valid={has_valid_image_embedding}, overall_valid={has_valid_embeddings}")
@@ -673,7 +648,7 @@ def _build_doc(base: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
 
     # Only add vector fields if they're valid (OpenSearch cosinesimil doesn't support zero vectors)
     if has_valid_text_embedding:
-        doc["vector_text"] = vec_text
+        doc["vector_text"] = index_vector(vec_text)
 
     # Add image vectors based on schema version
     if is_multi_vector:
@@ -684,7 +659,7 @@ def _build_doc(base: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
     else:
         # LEGACY: Single averaged vector for backward compatibility
         if has_valid_image_embedding:
-            doc["vector_image"] = vec_image
+            doc["vector_image"] = index_vector(vec_image)
 
     return doc
 
@@ -693,6 +668,27 @@ def _build_doc(base: Dict[str, Any], image_urls: List[str]) -> Dict[str, Any]:
 # LAMBDA HANDLER
 # ===============================================
 
+def _begin_bulk_load_safely() -> Optional[Dict[str, Any]]:
+    """Apply bulk-load index settings at the start of an ingest chain (non-fatal on failure).
+
+    Returns the pre-load settings to restore at the end of the chain, or None
+    if they couldn't be read (finalize then falls back to serving defaults).
+    """
+    try:
+        return begin_bulk_load()
+    except Exception as e:
+        logger.warning(f"Bulk-load settings failed (non-fatal): {e}")
+        return None
+
+
+def _finalize_index_safely(restore: Optional[Dict[str, Any]] = None):
+    """Restore serving settings and refresh the index once at the end of an ingest chain (non-fatal on failure)."""
+    try:
+        finalize_index(restore=restore)
+    except Exception as e:
+        logger.warning(f"Index finalize failed (non-fatal): {e}")
+
+
 def handler(event, context):
     """
     AWS Lambda handler for indexing real estate listings to OpenSearch.
@@ -814,6 +810,7 @@ def handler(event, context):
             if os_client.indices.exists(index=OS_INDEX):
                 logger.info(f"Deleting index {OS_INDEX}...")
                 os_client.indices.delete(index=OS_INDEX)
+                forget_index_ready(OS_INDEX)  # Recreate on the next warm invocation
                 return {"statusCode": 200, "body": json.dumps({"message": f"Index {OS_INDEX} deleted"})}
             else:
                 return {"statusCode": 404, "body": json.dumps({"message": f"Index {OS_INDEX} does not exist"})}
@@ -839,182 +836,203 @@ def handler(event, context):
     else:
         return {"statusCode": 400, "body": json.dumps({"error": "Provide {bucket,key} or {listings: []}."})}
 
-    total = len(all_listings)
-    limit = int(payload.get("limit", 500))
-    end = min(start + limit, total)
+    # Bulk-load settings are relaxed by the first invocation and handed down the
+    # chain; whichever invocation ends it (done, stopped or failed) restores them
+    bulk_restore = payload.get("_bulk_restore")
+    restore_pending = invocation_count > 0
+    try:
+        total = len(all_listings)
+        limit = int(payload.get("limit", 500))
+        end = min(start + limit, total)
+
+        # SAFEGUARD 2: Validate start is within bounds
+        if start >= total:
+            logger.warning(f"⚠️  start={start} is >= total={total}. No work to do.")
+            return {
+                "statusCode": 200,
+                "body": json.dumps({
+                    "ok": True,
+                    "message": "start >= total, nothing to process",
+                    "start": start,
+                    "total": total
+                })
+            }
 
-    # SAFEGUARD 2: Validate start is within bounds
-    if start >= total:
-        logger.warning(f"⚠️  start={start} is >= total={total}. No work to do.")
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "ok": True,
-                "message": "start >= total, nothing to process",
-                "start": start,
-                "total": total
-            })
-        }
+        # SAFEGUARD 3: Detect if start is not progressing (stuck loop)
+        if invocation_count > 0 and start == 0:
+            error_msg = f"🛑 LOOP DETECTED: Invocation {invocation_count} but start=0. Should be progressing."
+            logger.error(error_msg)
+            return {
+                "statusCode": 500,
+                "body": json.dumps({
+                    "error": "Infinite loop detected",
+                    "message": "start position not advancing across invocations"
+                })
+            }
 
-    # SAFEGUARD 3: Detect if start is not progressing (stuck loop)
-    if invocation_count > 0 and start == 0:
-        error_msg = f"🛑 LOOP DETECTED: Invocation {invocation_count} but start=0. Should be progressing."
-        logger.error(error_msg)
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "error": "Infinite loop detected",
-                "message": "start position not advancing across invocations"
-            })
-        }
+        # First batch of a job: relax refresh/replicas until finalize_index() at the end
+        if invocation_count == 0:
+            bulk_restore = _begin_bulk_load_safely()
+            restore_pending = True
+
+        # Enhanced logging: Track zpids in this batch
+        batch_zpids = [str(all_listings[i].get('zpid', 'unknown')) for i in range(start, min(end, total))]
+        logger.info(f"📦 Batch {start}-{end}: Processing {len(batch_zpids)} listings")
+        logger.info(f"   First 10 zpids: {batch_zpids[:10]}")
+        logger.info(f"   Source: bucket={payload.get('bucket', 'N/A')}, key={payload.get('key', 'N/A')}")
+        logger.info(f"   Invocation: {invocation_count}/50, Job ID: {job_id}")
+
+        SAFETY_MS = 30000  # stop ~30s early to allow self-invoke
+        processed = 0
+        success_count = 0
+        error_count = 0
+        error_details = []
+        processed_zpids = []  # Track zpids that were successfully processed
+        actions: List[Dict[str, Any]] = []
+
+        for i in range(start, end):
+            if context.get_remaining_time_in_millis() < SAFETY_MS:
+                logger.warning(f"⏰ Nearing timeout at listing {i}/{end}; breaking early to self-invoke")
+                break
+            try:
+                lst = all_listings[i]
+                zpid = lst.get('zpid', 'unknown')
+                core = _extract_core_fields(lst)
+                images = extract_zillow_images(lst, target_width=EMBEDDING_IMAGE_WIDTH, max_images=MAX_IMAGES)
+                doc = _build_doc(core, images)
 
-    # Enhanced logging: Track zpids in this batch
-    batch_zpids = [str(all_listings[i].get('zpid', 'unknown')) for i in range(start, min(end, total))]
-    logger.info(f"📦 Batch {start}-{end}: Processing {len(batch_zpids)} listings")
-    logger.info(f"   First 10 zpids: {batch_zpids[:10]}")
-    logger.info(f"   Source: bucket={payload.get('bucket', 'N/A')}, key={payload.get('key', 'N/A')}")
-    logger.info(f"   Invocation: {invocation_count}/50, Job ID: {job_id}")
-
-    SAFETY_MS = 30000  # stop ~30s early to allow self-invoke
-    processed = 0
-    success_count = 0
-    error_count = 0
-    error_details = []
-    processed_zpids = []  # Track zpids that were successfully processed
-    actions: List[Dict[str, Any]] = []
-
-    for i in range(start, end):
-        if context.get_remaining_time_in_millis() < SAFETY_MS:
-            logger.warning(f"⏰ Nearing timeout at listing {i}/{end}; breaking early to self-invoke")
-            break
-        try:
-            lst = all_listings[i]
-            zpid = lst.get('zpid', 'unknown')
-            core = _extract_core_fields(lst)
-            images = extract_zillow_images(lst, target_width=EMBEDDING_IMAGE_WIDTH)
-            doc = _build_doc(core, images)
+                # Prepare for bulk indexing
+                # NOTE: Complete Zillow JSON is kept in source dataset (slc_listings.json in S3)
+                # OpenSearch only stores search-relevant fields to keep it lean
+                actions.append({"_id": core["zpid"], "_source": doc})
 
-            # Prepare for bulk indexing
-            # NOTE: Complete Zillow JSON is kept in source dataset (slc_listings.json in S3)
-            # OpenSearch only stores search-relevant fields to keep it lean
-            actions.append({"_id": core["zpid"], "_source": doc})
+                if len(actions) >= UPLOAD_BULK_FLUSH:  # Docs handed to bulk_upsert per call
+                    bulk_upsert(actions)
+                    actions.clear()
 
-            if len(actions) >= 200:  # OK with backoff; lower to 150 if cluster is busy
-                bulk_upsert(actions)
-                actions.clear()
+                processed += 1
+                success_count += 1
+                processed_zpids.append(str(zpid))
 
-            processed += 1
-            success_count += 1
-            processed_zpids.append(str(zpid))
+                # Log every 10th listing for progress tracking
+                if processed % 10 == 0:
+                    logger.info(f"   Progress: {processed}/{len(batch_zpids)} listings processed")
 
-            # Log every 10th listing for progress tracking
-            if processed % 10 == 0:
-                logger.info(f"   Progress: {processed}/{len(batch_zpids)} listings processed")
+            except Exception as e:
+                error_count += 1
+                zpid = all_listings[i].get('zpid', 'unknown')
+                error_msg = f"zpid={zpid}, error={str(e)[:100]}"
+                error_details.append(error_msg)
+                logger.error(f"❌ Failed listing {i} (zpid={zpid}): {str(e)[:200]}")
+
+                # Continue processing despite errors (don't break the entire batch)
+                processed += 1
+
+        if actions:
+            bulk_upsert(actions)
+
+        # Enhanced logging: Report what was actually processed
+        processed_zpids = [str(all_listings[i].get('zpid', 'unknown')) for i in range(start, start + processed)]
+        logger.info(f"✅ Batch complete: Processed {processed}/{len(batch_zpids)} listings")
+        logger.info(f"   ✓ Successes: {success_count}")
+        logger.info(f"   ✗ Errors: {error_count}")
+        logger.info(f"   Processed zpids: {processed_zpids[:10]}")
+
+        if error_count > 0:
+            logger.error(f"❌ ERRORS IN BATCH: {error_count} listings failed")
+            for detail in error_details[:5]:  # Log first 5 errors
+                logger.error(f"   {detail}")
+            if len(error_details) > 5:
+                logger.error(f"   ... and {len(error_details) - 5} more errors")
+
+        if processed < len(batch_zpids):
+            skipped = len(batch_zpids) - processed
+            logger.warning(f"⚠️  Skipped {skipped} listings (timeout or errors)")
+
+        next_start = start + processed
+        has_more = next_start < total
+
+        # Self-invoke follow-up batch (async)
+        if has_more:
+            # Check if we've reached max invocations BEFORE attempting to self-invoke
+            if invocation_count + 1 >= max_invocations:
+                logger.warning(f"⏸️  Stopping at invocation {invocation_count}/{max_invocations}. More data available but max invocations reached.")
+                logger.info(f"   Next batch would start at: {next_start}")
+                _finalize_index_safely(bulk_restore)
+                restore_pending = False
+            else:
+                next_payload = {
+                    "start": next_start,
+                    "limit": limit,
+                    "_invocation_count": invocation_count + 1,  # SAFEGUARD: Increment counter
+                    "listings": all_listings,  # OPTIMIZATION: Always pass listings to avoid re-downloading
+                    "_bulk_restore": bulk_restore  # Pre-load index settings for whoever ends the chain
+                }
 
-        except Exception as e:
-            error_count += 1
-            zpid = all_listings[i].get('zpid', 'unknown')
-            error_msg = f"zpid={zpid}, error={str(e)[:100]}"
-            error_details.append(error_msg)
-            logger.error(f"❌ Failed listing {i} (zpid={zpid}): {str(e)[:200]}")
-
-            # Continue processing despite errors (don't break the entire batch)
-            processed += 1
-
-    if actions:
-        bulk_upsert(actions)
-
-    # Enhanced logging: Report what was actually processed
-    processed_zpids = [str(all_listings[i].get('zpid', 'unknown')) for i in range(start, start + processed)]
-    logger.info(f"✅ Batch complete: Processed {processed}/{len(batch_zpids)} listings")
-    logger.info(f"   ✓ Successes: {success_count}")
-    logger.info(f"   ✗ Errors: {error_count}")
-    logger.info(f"   Processed zpids: {processed_zpids[:10]}")
-
-    if error_count > 0:
-        logger.error(f"❌ ERRORS IN BATCH: {error_count} listings failed")
-        for detail in error_details[:5]:  # Log first 5 errors
-            logger.error(f"   {detail}")
-        if len(error_details) > 5:
-            logger.error(f"   ... and {len(error_details) - 5} more errors")
-
-    if processed < len(batch_zpids):
-        skipped = len(batch_zpids) - processed
-        logger.warning(f"⚠️  Skipped {skipped} listings (timeout or errors)")
-
-    next_start = start + processed
-    has_more = next_start < total
-
-    # Self-invoke follow-up batch (async)
-    if has_more:
-        # Check if we've reached max invocations BEFORE attempting to self-invoke
-        if invocation_count + 1 >= max_invocations:
-            logger.warning(f"⏸️  Stopping at invocation {invocation_count}/{max_invocations}. More data available but max invocations reached.")
-            logger.info(f"   Next batch would start at: {next_start}")
+                # Pass through job_id for tracking
+                if job_id:
+                    next_payload["_job_id"] = job_id
+
+                # SAFEGUARD 4: Validate next_start is actually progressing
+                if next_start <= start:
+                    error_msg = f"🛑 SAFETY: next_start={next_start} not > start={start}. Refusing to self-invoke."
+                    logger.error(error_msg)
+                    return {
+                        "statusCode": 500,
+                        "body": json.dumps({
+                            "error": "Loop prevention",
+                            "message": "next_start must be greater than start",
+                            "start": start,
+                            "next_start": next_start
+                        })
+                    }
+
+                try:
+                    logger.info("Self-invoking %s start=%d limit=%d invocation=%d", context.invoked_function_arn, next_start, limit, invocation_count + 1)
+                    lambda_client.invoke(
+                        FunctionName=context.invoked_function_arn,
+                        InvocationType="Event",
+                        Payload=json.dumps(next_payload).encode("utf-8"),
+                    )
+                    logger.info("✅ Self-invoked for next batch: start=%d limit=%d invocation=%d/%d", next_start, limit, invocation_count + 1, max_invocations)
+                    restore_pending = False  # The next invocation owns the index settings now
+                except Exception as e:
+                    logger.exception("Self-invoke failed: %s", e)
         else:
-            next_payload = {
-                "start": next_start,
-                "limit": limit,
-                "_invocation_count": invocation_count + 1,  # SAFEGUARD: Increment counter
-                "listings": all_listings  # OPTIMIZATION: Always pass listings to avoid re-downloading
-            }
+            # Job complete - make all bulk-indexed documents searchable
+            _finalize_index_safely(bulk_restore)
+            restore_pending = False
 
-            # Pass through job_id for tracking
+            # Mark as finished in DynamoDB
             if job_id:
-                next_payload["_job_id"] = job_id
-
-            # SAFEGUARD 4: Validate next_start is actually progressing
-            if next_start <= start:
-                error_msg = f"🛑 SAFETY: next_start={next_start} not > start={start}. Refusing to self-invoke."
-                logger.error(error_msg)
-                return {
-                    "statusCode": 500,
-                    "body": json.dumps({
-                        "error": "Loop prevention",
-                        "message": "next_start must be greater than start",
-                        "start": start,
-                        "next_start": next_start
-                    })
-                }
-
-            try:
-                logger.info("Self-invoking %s start=%d limit=%d invocation=%d", context.invoked_function_arn, next_start, limit, invocation_count + 1)
-                lambda_client.invoke(
-                    FunctionName=context.invoked_function_arn,
-                    InvocationType="Event",
-                    Payload=json.dumps(next_payload).encode("utf-8"),
-                )
-                logger.info("✅ Self-invoked for next batch: start=%d limit=%d invocation=%d/%d", next_start, limit, invocation_count + 1, max_invocations)
-            except Exception as e:
-                logger.exception("Self-invoke failed: %s", e)
-    else:
-        # Job complete - mark as finished in DynamoDB
-        if job_id:
-            try:
-                import time
-                dynamodb.put_item(
-                    TableName=JOB_TRACKING_TABLE,
-                    Item={
-                        "job_id": {"S": job_id},
-                        "status": {"S": "completed"},
-                        "completed_at": {"N": str(int(time.time()))},
-                        "total_processed": {"N": str(start + processed)}
-                    }
-                )
-                logger.info(f"✅ Job {job_id} marked as completed")
-            except Exception as e:
-                logger.warning(f"Job tracking update failed (non-fatal): {e}")
+                try:
+                    import time
+                    dynamodb.put_item(
+                        TableName=JOB_TRACKING_TABLE,
+                        Item={
+                            "job_id": {"S": job_id},
+                            "status": {"S": "completed"},
+                            "completed_at": {"N": str(int(time.time()))},
+                            "total_processed": {"N": str(start + processed)}
+                        }
+                    )
+                    logger.info(f"✅ Job {job_id} marked as completed")
+                except Exception as e:
+                    logger.warning(f"Job tracking update failed (non-fatal): {e}")
 
-    return {
-        "statusCode": 200,
-        "body": json.dumps({
-            "ok": True,
-            "index": OS_INDEX,
-            "batch": {"start": start, "processed": processed, "limit": limit},
-            "next_start": next_start if has_more else None,
-            "total": total,
-            "job_id": job_id,
-            "has_more": has_more,
-            "zpid": processed_zpids[0] if processed_zpids else "unknown"
-        })
-    }
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "ok": True,
+                "index": OS_INDEX,
+                "batch": {"start": start, "processed": processed, "limit": limit},
+                "next_start": next_start if has_more else None,
+                "total": total,
+                "job_id": job_id,
+                "has_more": has_more,
+                "zpid": processed_zpids[0] if processed_zpids else "unknown"
+            })
+        }
+    finally:
+        if restore_pending:
+            _finalize_index_safely(bulk_restore)